@@ -3,9 +3,13 @@
 예약 발행 + 퍼즐 이미지 생성 (매일 1회 실행)
 - init: posts_schedule.json 생성 (287개를 날짜별 1~3개 배정)
 - 일반 실행: 오늘 날짜에 해당하는 글만 발행 (이미지 생성 → HTML → manifest 갱신 → index·posts.xml)
+- changed: 발행된 글 중 data.js 내용(title·category·allWords)이 바뀐 퀴즈만 글·이미지·사이트맵 재생성
+- --rebuild-cache: data.js 파싱 캐시(.cache/quiz_db.json, quiz_index.json) 강제 재생성
+- --image-report: 끝에 출력하는 이미지 용량 보고에 예전 PNG 방식 대비 절약량 포함 (이미지마다 인코딩 한 번 더)
 """
 import os
 import re
+import sys
 import json
 import random
 from datetime import datetime, timedelta
@@ -19,10 +23,20 @@ from generate_seo_posts import (
     KEYWORDS_BY_PREFIX,
     DOMAIN,
 )
+from quiz_db import (
+    cached_quiz_records,
+    load_database,
+    load_quiz_index,
+    quiz_fingerprint,
+    read_quiz_words,
+    records_by_id,
+)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 SCHEDULE_PATH = os.path.join(SCRIPT_DIR, 'posts_schedule.json')
 MANIFEST_PATH = os.path.join(SCRIPT_DIR, 'published_manifest.json')
+# 퀴즈 id -> 발행 당시 내용 지문 (changed 모드에서 비교)
+FINGERPRINTS_PATH = os.path.join(SCRIPT_DIR, 'published_fingerprints.json')
 DATA_JS = os.path.join(SCRIPT_DIR, 'data.js')
 POSTS_DIR = os.path.join(SCRIPT_DIR, 'posts')
 PUZZLES_IMG_DIR = os.path.join(SCRIPT_DIR, 'images', 'puzzles')
@@ -33,27 +47,30 @@ POSTS_PER_DAY = (1, 1)
 
 try:
     from PIL import Image, ImageDraw, ImageFont
+    from image_output import ImageStats, save_image
     HAS_PILLOW = True
 except ImportError:
     HAS_PILLOW = False
 
+# 저장한 퍼즐 이미지 바이트 합계 (실행 끝에 출력). 형식 설정은 image_output 참고, 절약량 계산은 --image-report일 때만
+IMAGE_STATS = ImageStats(measure='--image-report' in sys.argv) if HAS_PILLOW else None
+
 try:
     from playwright.sync_api import sync_playwright
     HAS_PLAYWRIGHT = True
 except ImportError:
     HAS_PLAYWRIGHT = False
 
-
-def find_matching_brace(text, start_pos, open_c, close_c):
-    depth = 0
-    for i in range(start_pos, len(text)):
-        if text[i] == open_c:
-            depth += 1
-        elif text[i] == close_c:
-            depth -= 1
-            if depth == 0:
-                return i
-    return -1
+# 퍼즐 이미지·play URL은 기본적으로 Python 엔진(puzzle_export, Pillow만 필요)으로 만들고
+# Playwright(play2.html?export=1)는 Python 엔진이 실패했을 때만 사용. PUZZLE_EXPORT=browser 이면 브라우저 우선
+HAS_PUZZLE_EXPORT = False
+if HAS_PILLOW:
+    try:
+        from puzzle_export import check_number_font, export_puzzle_image
+        HAS_PUZZLE_EXPORT = True
+    except ImportError:
+        pass
+HAS_EXPORT_ENGINE = HAS_PUZZLE_EXPORT or HAS_PLAYWRIGHT
 
 
 def make_slug_korean(book, keyword):
@@ -80,6 +97,11 @@ def make_image_slug(puzzle):
     return (s or 'puzzle') + '-십자가로세로'
 
 
+def get_display_title(puzzle):
+    book = puzzle['title'].split(':')[0].strip() if ':' in puzzle['title'] else puzzle['title'].split()[0]
+    return (puzzle.get('title') or '').strip() or f"{book} 퀴즈"
+
+
 def get_keyword_for_puzzle(puzzle):
     book = puzzle['title'].split(':')[0].strip() if ':' in puzzle['title'] else puzzle['title'].split()[0]
     kw = random.choice(KEYWORDS_BY_PREFIX)
@@ -103,11 +125,45 @@ def _find_chrome_executable():
     return None
 
 
+def make_answer_url(play_g, play_hints):
+    """블로그 하단 링크: 같은 퍼즐 빈 칸 + 실제 힌트 (g=, h1=가로, h2=세로 분리로 URL 잘림 방지)"""
+    import base64
+    if not play_g:
+        return ''
+    answer_url = f"{DOMAIN}/play2.html?play=1&g={quote(play_g, safe='')}"
+    if play_hints:
+        try:
+            hints_obj = json.loads(play_hints)
+            arr_a = hints_obj.get('a') or hints_obj.get('across') or []
+            arr_d = hints_obj.get('d') or hints_obj.get('down') or []
+            b64_a = base64.urlsafe_b64encode(json.dumps(arr_a, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
+            b64_d = base64.urlsafe_b64encode(json.dumps(arr_d, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
+            answer_url += f"&h1={quote(b64_a, safe='')}&h2={quote(b64_d, safe='')}"
+        except Exception:
+            pass
+    return answer_url
+
+
+def export_puzzle_image_via_python(pid, slug):
+    """export_puzzle_image_via_browser와 같은 형식의 결과를 브라우저 없이 생성 (puzzle_export, 배치는 Python 빌더).
+    반환: (성공여부, across_힌트리스트, down_힌트리스트, answer_url, play_hints_json 또는 None)"""
+    if not HAS_PUZZLE_EXPORT:
+        return False, [], [], '', None
+    out_path = os.path.join(PUZZLES_IMG_DIR, slug + '.png')
+    try:
+        across, down, play_g, play_hints = export_puzzle_image(pid, out_path, stats=IMAGE_STATS)
+        return True, across, down, make_answer_url(play_g, play_hints), play_hints
+    except Exception as e:
+        if os.environ.get('DEBUG'):
+            print(f"  ⚠️ Python 내보내기 실패 ({pid}): {e}")
+        return False, [], [], '', None
+
+
 def export_puzzle_image_via_browser(pid, slug, timeout=15000):
     """play2.html?id=pid&export=1 로 열어 퍼즐 PNG 저장 + (가로/세로 힌트, 동일 퍼즐 play URL, 힌트 num+clue JSON) 반환.
     반환: (성공여부, across_힌트리스트, down_힌트리스트, answer_url, play_hints_json 또는 None)"""
     if not HAS_PLAYWRIGHT:
-        return False, [], [], ''
+        return False, [], [], '', None
     import base64
     from pathlib import Path
     play_path = Path(SCRIPT_DIR) / 'play2.html'
@@ -133,25 +189,17 @@ def export_puzzle_image_via_browser(pid, slug, timeout=15000):
             play_g = page.evaluate('window.__puzzlePlayG || ""')
             play_hints = page.evaluate('window.__puzzleExportHints || ""')
             browser.close()
-            # 블로그 하단 링크: 같은 퍼즐 빈 칸 + 실제 힌트 (g=, h1=가로, h2=세로 분리로 URL 잘림 방지)
-            answer_url = ''
-            if play_g:
-                answer_url = f"{DOMAIN}/play2.html?play=1&g={quote(play_g, safe='')}"
-                if play_hints:
-                    try:
-                        hints_obj = json.loads(play_hints)
-                        arr_a = hints_obj.get('a') or hints_obj.get('across') or []
-                        arr_d = hints_obj.get('d') or hints_obj.get('down') or []
-                        b64_a = base64.urlsafe_b64encode(json.dumps(arr_a, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
-                        b64_d = base64.urlsafe_b64encode(json.dumps(arr_d, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
-                        answer_url += f"&h1={quote(b64_a, safe='')}&h2={quote(b64_d, safe='')}"
-                    except Exception:
-                        pass
+            answer_url = make_answer_url(play_g, play_hints)
         if not data_url or not data_url.startswith('data:image/png;base64,'):
             return False, [], [], '', None
-        b64 = data_url.split(',', 1)[1]
-        with open(out_path, 'wb') as f:
-            f.write(base64.b64decode(b64))
+        png = base64.b64decode(data_url.split(',', 1)[1])
+        if HAS_PILLOW:
+            # 캔버스 PNG(RGBA 기본 압축)를 팔레트 PNG로 다시 저장
+            import io
+            save_image(Image.open(io.BytesIO(png)), out_path, stats=IMAGE_STATS)
+        else:
+            with open(out_path, 'wb') as f:
+                f.write(png)
         return True, across, down, answer_url, (play_hints if play_hints else None)
     except Exception as e:
         if os.environ.get('DEBUG'):
@@ -181,7 +229,7 @@ def generate_puzzle_grid_image(slug, hint_count, size=420, cells=15):
         row, col = i // cells, i % cells
         draw.text((col * cell + 2, row * cell + 2), str(i + 1), fill=(100, 100, 100), font=font)
     path = os.path.join(PUZZLES_IMG_DIR, f"{slug}.png")
-    img.save(path, 'PNG')
+    save_image(img, path, stats=IMAGE_STATS)
     return path
 
 
@@ -221,32 +269,12 @@ def get_semantic_quiz_url(book, pid):
     return f"{DOMAIN}/bible-quiz/{slug}?id={pid}"
 
 def extract_quiz_qa_from_data_js(pid, max_items=8):
-    """data.js에서 특정 퍼즐의 clue/answer 쌍을 직접 추출."""
+    """data.js에서 특정 퍼즐의 clue/answer 쌍을 직접 추출. (인덱스 + mmap으로 해당 퀴즈 allWords 구간만 읽음)"""
     try:
-        with open(DATA_JS, 'r', encoding='utf-8') as f:
-            content = f.read()
-        pat = re.compile(r'"' + re.escape(pid) + r'"\s*:\s*\{')
-        m = pat.search(content)
-        if not m:
-            return []
-        start = m.end() - 1
-        end = find_matching_brace(content, start, '{', '}')
-        if end == -1:
-            return []
-        block = content[start:end + 1]
-        aw = re.search(r'allWords:\s*\[', block)
-        if not aw:
-            return []
-        arr_start = aw.end() - 1
-        arr_end = find_matching_brace(block, arr_start, '[', ']')
-        if arr_end == -1:
-            return []
-        arr = block[arr_start:arr_end + 1]
-        pairs = re.findall(r'clue:\s*"([^"]*)"\s*,\s*answer:\s*"([^"]*)"', arr)
         out = []
-        for clue, answer in pairs[:max_items]:
-            if clue and answer:
-                out.append({"clue": clue, "answer": answer})
+        for w in read_quiz_words(pid, DATA_JS)[:max_items]:
+            if w['clue'] and w['answer']:
+                out.append({"clue": w['clue'], "answer": w['answer']})
         return out
     except Exception:
         return []
@@ -511,6 +539,23 @@ def save_manifest(entries):
         json.dump(entries, f, ensure_ascii=False, indent=2)
 
 
+def load_fingerprints():
+    if os.path.exists(FINGERPRINTS_PATH):
+        with open(FINGERPRINTS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_fingerprints(fingerprints):
+    with open(FINGERPRINTS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(fingerprints.items())), f, ensure_ascii=False, indent=2)
+
+
+def current_fingerprints():
+    """data.js 현재 내용 기준 퀴즈 id -> 지문"""
+    return {pid: quiz_fingerprint(rec) for pid, rec in records_by_id(cached_quiz_records(DATA_JS)).items()}
+
+
 def rebuild_index_and_xml(manifest_entries):
     """발행된 글만으로 posts/index.html, posts.xml 재생성 (날짜 반영)"""
     os.makedirs(POSTS_DIR, exist_ok=True)
@@ -523,7 +568,7 @@ def rebuild_index_and_xml(manifest_entries):
         for e in entries:
             f.write(f'  <url>\n')
             f.write(f'    <loc>{DOMAIN}/posts/{e["slug"]}.html</loc>\n')
-            f.write(f'    <lastmod>{e["date"]}</lastmod>\n')
+            f.write(f'    <lastmod>{e.get("updated") or e["date"]}</lastmod>\n')
             f.write(f'    <changefreq>weekly</changefreq>\n')
             f.write(f'    <priority>0.7</priority>\n')
             f.write(f'  </url>\n')
@@ -632,6 +677,46 @@ main {{ max-width: 820px; margin: 0 auto; padding: 40px 20px; }}
     print("  → posts/index.html, posts.xml 갱신 완료 (발행된 글만 반영)")
 
 
+def write_post(puzzle, keyword, slug, display_title, publish_date):
+    """퍼즐 이미지 생성 → 글 HTML 작성 (posts/{slug}.html). 퍼즐 이미지 생성 여부 반환."""
+    pid = puzzle['id']
+    hint_count = len(puzzle.get('hints') or [])
+    has_img = False
+    export_across, export_down, answer_url = None, None, ''
+    export_hints_with_num = None
+    image_slug = make_image_slug(puzzle)  # 제목-십자가로세로.png
+    engines = [('Python', export_puzzle_image_via_python), ('play2', export_puzzle_image_via_browser)]
+    if os.environ.get('PUZZLE_EXPORT') == 'browser':
+        engines.reverse()
+    for name, export in engines:
+        ok, export_across, export_down, answer_url, play_hints_json = export(pid, image_slug)
+        if ok:
+            print(f"  🎨 이미지 생성({name}): {image_slug}.png")
+            has_img = True
+            if play_hints_json:
+                try:
+                    export_hints_with_num = json.loads(play_hints_json)
+                except Exception:
+                    pass
+            break
+    if not has_img and HAS_PILLOW:
+        generate_puzzle_grid_image(image_slug, hint_count)
+        print(f"  🎨 이미지 생성(Pillow): {image_slug}.png")
+        has_img = True
+    if not has_img:
+        print(f"  ⚠️ Pillow/Playwright 미설치 → og 이미지 사용")
+    html = generate_post_html_with_image(
+        puzzle, keyword, slug, publish_date, image_slug, has_puzzle_image=has_img,
+        display_title=display_title,
+        export_across=export_across, export_down=export_down, answer_link_override=answer_url or None,
+        export_hints_with_num=export_hints_with_num
+    )
+    path = os.path.join(POSTS_DIR, f"{slug}.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return has_img
+
+
 def publish_today(force_date=None):
     """force_date: 'YYYY-MM-DD' (테스트용). 없으면 오늘."""
     today = force_date or datetime.now().strftime('%Y-%m-%d')
@@ -647,10 +732,10 @@ def publish_today(force_date=None):
         rebuild_index_and_xml(load_manifest())
         return
 
-    # 최종 결과물(퍼즐 이미지 + 이 퍼즐 풀어보기)을 내려면 Playwright 필수. og 이미지로 대체하지 않음.
-    if not HAS_PLAYWRIGHT:
-        print("❌ 발행 중단: Playwright가 없습니다. 최종 결과물(퍼즐 이미지 + 이 퍼즐 풀어보기)을 내려면 필수입니다.")
-        print("   설치: pip install playwright && playwright install chromium")
+    # 최종 결과물(퍼즐 이미지 + 이 퍼즐 풀어보기)을 내려면 내보내기 엔진(Pillow 또는 Playwright) 필수. og 이미지로 대체하지 않음.
+    if not HAS_EXPORT_ENGINE:
+        print("❌ 발행 중단: 퍼즐 내보내기 엔진이 없습니다. 최종 결과물(퍼즐 이미지 + 이 퍼즐 풀어보기)을 내려면 필수입니다.")
+        print("   설치: pip install -r requirements.txt (Pillow)")
         rebuild_index_and_xml(load_manifest())
         return
     os.makedirs(PUZZLES_IMG_DIR, exist_ok=True)
@@ -658,6 +743,8 @@ def publish_today(force_date=None):
     puzzles = parse_data_js(DATA_JS)
     by_id = {p['id']: p for p in puzzles}
     manifest = load_manifest()
+    fingerprints = load_fingerprints()
+    current = current_fingerprints()
     published_slugs = {e['slug'] for e in manifest}
     os.makedirs(POSTS_DIR, exist_ok=True)
 
@@ -670,8 +757,7 @@ def publish_today(force_date=None):
         if not puzzle:
             continue
         keyword = get_keyword_for_puzzle(puzzle)
-        book = puzzle['title'].split(':')[0].strip() if ':' in puzzle['title'] else puzzle['title'].split()[0]
-        display_title = (puzzle.get('title') or '').strip() or f"{book} 퀴즈"
+        display_title = get_display_title(puzzle)
         slug = make_slug_from_title(display_title)
         if not slug:
             slug = f"puzzle-{pid}"
@@ -679,36 +765,7 @@ def publish_today(force_date=None):
             slug = f"{slug}-{pid}"
         published_slugs.add(slug)
 
-        hint_count = len(puzzle.get('hints') or [])
-        has_img = False
-        export_across, export_down, answer_url = None, None, ''
-        export_hints_with_num = None
-        image_slug = make_image_slug(puzzle)  # 제목-십자가로세로.png
-        if HAS_PLAYWRIGHT:
-            ok, export_across, export_down, answer_url, play_hints_json = export_puzzle_image_via_browser(pid, image_slug)
-            if ok:
-                print(f"  🎨 이미지 생성(play2): {image_slug}.png")
-                has_img = True
-                if play_hints_json:
-                    try:
-                        export_hints_with_num = json.loads(play_hints_json)
-                    except Exception:
-                        pass
-        if not has_img and HAS_PILLOW:
-            generate_puzzle_grid_image(image_slug, hint_count)
-            print(f"  🎨 이미지 생성(Pillow): {image_slug}.png")
-            has_img = True
-        if not has_img:
-            print(f"  ⚠️ Playwright/Pillow 미설치 → og 이미지 사용")
-        html = generate_post_html_with_image(
-            puzzle, keyword, slug, publish_date, image_slug, has_puzzle_image=has_img,
-            display_title=display_title,
-            export_across=export_across, export_down=export_down, answer_link_override=answer_url or None,
-            export_hints_with_num=export_hints_with_num
-        )
-        path = os.path.join(POSTS_DIR, f"{slug}.html")
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        has_img = write_post(puzzle, keyword, slug, display_title, publish_date)
         img_note = f" (이미지: {slug}.png)" if has_img else ""
         print(f"  ✅ 발행: {slug}.html{img_note}")
 
@@ -718,8 +775,10 @@ def publish_today(force_date=None):
             'id': pid,
             'title': display_title,
         })
+        fingerprints[pid] = current.get(pid)
 
     save_manifest(manifest)
+    save_fingerprints(fingerprints)
     rebuild_index_and_xml(manifest)
     print(f"\n🎉 완료! 오늘 {len(today_ids)}개 발행 (총 발행 {len(manifest)}개)")
 
@@ -748,23 +807,89 @@ def publish_catchup():
     print(f"\n🎉 캐치업 완료: {len(to_publish)}일 발행됨")
 
 
+def publish_changed():
+    """이미 발행된 글 중 data.js 내용이 바뀐 퀴즈만 재생성 (슬러그·발행일 유지, 사이트맵 lastmod만 갱신).
+    지문이 없는 퀴즈는 현재 내용을 기준점으로 기록만 함."""
+    manifest = load_manifest()
+    fingerprints = load_fingerprints()
+    current = current_fingerprints()
+
+    baseline = {e['id'] for e in manifest if e['id'] not in fingerprints and e['id'] in current}
+    for pid in baseline:
+        fingerprints[pid] = current[pid]
+    if baseline:
+        print(f"📌 지문 기준점 기록: {len(baseline)}개 퀴즈")
+    changed = [
+        e for e in manifest
+        if e['id'] in current and e['id'] not in baseline and fingerprints.get(e['id']) != current[e['id']]
+    ]
+    if not changed:
+        if baseline:
+            save_fingerprints(fingerprints)
+        print("내용이 바뀐 퀴즈 없음. 완료.")
+        return
+    if not HAS_EXPORT_ENGINE:
+        print("❌ 재생성 중단: 퍼즐 내보내기 엔진이 없습니다. 설치: pip install -r requirements.txt (Pillow)")
+        if baseline:
+            save_fingerprints(fingerprints)
+        return
+
+    print(f"♻️ 내용 변경 {len(changed)}개 글 재생성")
+    os.makedirs(PUZZLES_IMG_DIR, exist_ok=True)
+    os.makedirs(POSTS_DIR, exist_ok=True)
+    by_id = {p['id']: p for p in parse_data_js(DATA_JS)}
+    today = datetime.now().strftime('%Y-%m-%d')
+    for e in changed:
+        puzzle = by_id[e['id']]
+        display_title = get_display_title(puzzle)
+        try:
+            publish_date = datetime.strptime(e['date'], '%Y-%m-%d')
+        except ValueError:
+            publish_date = datetime.now()
+        has_img = write_post(puzzle, get_keyword_for_puzzle(puzzle), e['slug'], display_title, publish_date)
+        img_note = " (이미지 포함)" if has_img else ""
+        print(f"  ✅ 재생성: {e['slug']}.html{img_note}")
+        e['title'] = display_title
+        e['updated'] = today
+    for e in changed:
+        fingerprints[e['id']] = current[e['id']]
+
+    save_manifest(manifest)
+    save_fingerprints(fingerprints)
+    rebuild_index_and_xml(manifest)
+    print(f"\n🎉 재생성 완료: {len(changed)}개")
+
+
 def main():
-    import sys
-    if len(sys.argv) > 1:
-        arg1 = sys.argv[1].strip().lower()
-        if arg1 == 'init':
-            init_schedule()
-            return
-        if arg1 == 'catchup':
-            publish_catchup()
-            return
-    # 테스트: python3 auto_publish_with_images.py --date=2026-02-20
-    force = None
-    for arg in sys.argv[1:]:
-        if arg.startswith('--date='):
-            force = arg.split('=', 1)[1].strip()
-            break
-    publish_today(force_date=force)
+    # 러너에 글꼴이 없으면 퍼즐 번호가 Pillow 기본 글꼴로 작게 그려지므로 발행 전에 알림
+    font_warning = check_number_font() if HAS_PUZZLE_EXPORT else None
+    if font_warning:
+        print(f"⚠️ {font_warning}")
+    if '--rebuild-cache' in sys.argv:
+        load_database(DATA_JS, rebuild=True)
+        load_quiz_index(DATA_JS, rebuild=True)
+    try:
+        if len(sys.argv) > 1:
+            arg1 = sys.argv[1].strip().lower()
+            if arg1 == 'init':
+                init_schedule()
+                return
+            if arg1 == 'catchup':
+                publish_catchup()
+                return
+            if arg1 == 'changed':
+                publish_changed()
+                return
+        # 테스트: python3 auto_publish_with_images.py --date=2026-02-20
+        force = None
+        for arg in sys.argv[1:]:
+            if arg.startswith('--date='):
+                force = arg.split('=', 1)[1].strip()
+                break
+        publish_today(force_date=force)
+    finally:
+        if IMAGE_STATS is not None and IMAGE_STATS.files:
+            print(f"🖼️ {IMAGE_STATS.report()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+퀴즈별 난이도 3단계 배치 미리 생성 (play.html이 브라우저에서 배치를 만들지 않고 바로 표시할 수 있게)
+- quiz-data/layouts/<id>.<해시>.json : {id, size, levels: {"1"~"3": {label, time, qCount, density, 배치}}}
+- quiz-data/layouts/index.json       : {id: 파일명}
+- 단어 풀은 play.html과 같은 규칙 (data_bible_extra.js 병합 후 같은 접두어 퀴즈 통합), 격자는 play.html과 같은 15x15
+- 세 단계는 social_export/social_batch_export.py의 build_levels 한 번으로 만듦: 같은 격자에 단어를 이어 놓으며
+  단계마다 config의 qCount 단어 또는 density 칸 채움율에 닿는 순간을 저장 (어려운 단계가 쉬운 단계를 포함)
+- 배치 JSON은 built_to_json 형식 (solution, numbers [x, y, 번호], across/down [번호, x, y, 힌트, 정답])
+- 사용: python3 build_level_layouts.py [출력 폴더] [--rebuild-cache]
+"""
+import os
+import sys
+import hashlib
+
+from build_quiz_shards import HASH_LEN, OUT_DIR, dump_min, merged_words, write_if_changed
+from puzzle_export import combined_words
+from quiz_db import DATA_JS, EXTRA_JS, load_database, records_by_id
+from social_batch_export import (  # puzzle_export가 social_export 폴더를 sys.path에 추가함
+    SIZE,
+    PuzzleData,
+    build_levels,
+    built_to_json,
+    default_seed,
+    usable_words,
+)
+
+LAYOUT_DIR = os.path.join(OUT_DIR, "layouts")
+
+
+def level_word_pool(pid, records):
+    """play.html loadAndTranslateData()의 ?id= 단어 풀: 같은 접두어 퀴즈가 더 있으면 통합, 아니면 그 퀴즈만."""
+    prefix = pid.split("_")[0]
+    pool = combined_words(records, lambda qid, r: qid.startswith(prefix + "_"))
+    return pool if len(pool) > len(records[pid]["allWords"]) else records[pid]["allWords"]
+
+
+def level_layouts(pid, records):
+    """퀴즈 하나의 단계별 배치 (JSON으로 쓸 dict). 놓을 단어가 없으면 None."""
+    rec = records[pid]
+    words = usable_words(level_word_pool(pid, records))
+    if not words or not rec["config"]:
+        return None
+    data = PuzzleData(puzzle_id=pid, title=rec["title"] or pid, words=words)
+    built = build_levels(data, rec["config"], default_seed(pid), SIZE)
+    levels = {}
+    for key, b in built.items():
+        cfg = rec["config"][key]
+        levels[key] = {
+            "label": cfg.get("label"),
+            "time": cfg.get("time"),
+            "qCount": cfg["qCount"],
+            "density": cfg["density"],
+            **built_to_json(b),
+        }
+    return {"id": pid, "size": SIZE, "levels": levels}
+
+
+def build_level_layouts(out_dir=LAYOUT_DIR, data_js=DATA_JS, extra_js=EXTRA_JS, rebuild=False):
+    """배치 JSON·index.json 생성 후 남은 이전 파일 삭제. (퀴즈 수, 새로 쓴 파일 수, 삭제 수) 반환."""
+    db = load_database(data_js, extra_js, rebuild=rebuild)
+    extra = db["extra"] or {}
+    records = {qid: dict(rec, allWords=merged_words(rec, extra.get(qid)))
+               for qid, rec in records_by_id(db["records"]).items()}
+    os.makedirs(out_dir, exist_ok=True)
+
+    index = {}
+    keep = {"index.json"}
+    written = 0
+    for qid in records:
+        layouts = level_layouts(qid, records)
+        if layouts is None:
+            continue
+        data = dump_min(layouts)
+        name = f"{qid}.{hashlib.sha256(data).hexdigest()[:HASH_LEN]}.json"
+        written += write_if_changed(os.path.join(out_dir, name), data)
+        keep.add(name)
+        index[qid] = name
+
+    written += write_if_changed(os.path.join(out_dir, "index.json"), dump_min(index))
+
+    removed = 0
+    for name in os.listdir(out_dir):
+        if name.endswith(".json") and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    return len(index), written, removed
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    out_dir = os.path.abspath(args[0]) if args else LAYOUT_DIR
+    count, written, removed = build_level_layouts(out_dir, rebuild="--rebuild-cache" in sys.argv)
+    total = sum(os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir))
+    print(f"완료: {out_dir} — 퀴즈 {count}개 x 3단계 (새로 씀 {written}, 삭제 {removed}), 전체 {total / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
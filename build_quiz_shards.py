@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+퀴즈별 JSON 샤드 생성 (data.js + data_bible_extra.js 기반)
+- quiz-data/<id>.<해시>.json : 퀴즈 하나 (title, category, meta, config, allWords), 공백 없는 JSON
+- quiz-data/index.json       : [{id, title, category, file}] 목록 (파일명만 보고 샤드를 찾음)
+- 샤드 파일명에 내용 해시가 들어가므로 장기 캐시 가능 (내용이 바뀌면 파일명이 바뀜)
+- data_bible_extra.js 단어는 play.html과 같은 규칙으로 allWords에 병합 (기존 answer와 겹치면 생략)
+- 사용: python3 build_quiz_shards.py [출력 폴더] [--rebuild-cache]
+"""
+import os
+import sys
+import json
+import hashlib
+
+from quiz_db import DATA_JS, EXTRA_JS, SCRIPT_DIR, load_database, records_by_id
+
+OUT_DIR = os.path.join(SCRIPT_DIR, "quiz-data")
+HASH_LEN = 10
+
+
+def merged_words(rec, extra_words):
+    """play.html의 BIBLE_EXTRA_WORDS 병합과 같은 결과."""
+    words = list(rec["allWords"])
+    existing = {w["answer"] for w in words}
+    for w in extra_words or []:
+        if isinstance(w, dict) and w.get("answer") not in existing:
+            words.append({"clue": str(w.get("clue") or ""), "answer": str(w.get("answer") or "")})
+            existing.add(w["answer"])
+    return words
+
+
+def dump_min(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def shard_bytes(rec, extra_words):
+    return dump_min({
+        "id": rec["id"],
+        "title": rec["title"],
+        "category": rec["category"],
+        "meta": rec["meta"],
+        "config": rec["config"],
+        "allWords": merged_words(rec, extra_words),
+    })
+
+
+def write_if_changed(path, data):
+    """내용이 같으면 쓰지 않음 (mtime 유지). 썼으면 True."""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def build_shards(out_dir=OUT_DIR, data_js=DATA_JS, extra_js=EXTRA_JS, rebuild=False):
+    """샤드·index.json 생성 후 이전 빌드의 남은 샤드 삭제. (퀴즈 수, 새로 쓴 파일 수, 삭제 수) 반환."""
+    db = load_database(data_js, extra_js, rebuild=rebuild)
+    extra = db["extra"] or {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    index = []
+    keep = {"index.json"}
+    written = 0
+    for qid, rec in records_by_id(db["records"]).items():
+        data = shard_bytes(rec, extra.get(qid))
+        name = f"{qid}.{hashlib.sha256(data).hexdigest()[:HASH_LEN]}.json"
+        written += write_if_changed(os.path.join(out_dir, name), data)
+        keep.add(name)
+        index.append({"id": qid, "title": rec["title"], "category": rec["category"], "file": name})
+
+    written += write_if_changed(os.path.join(out_dir, "index.json"), dump_min(index))
+
+    removed = 0
+    for name in os.listdir(out_dir):
+        if name.endswith(".json") and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    return len(index), written, removed
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    out_dir = os.path.abspath(args[0]) if args else OUT_DIR
+    count, written, removed = build_shards(out_dir, rebuild="--rebuild-cache" in sys.argv)
+    total = sum(os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir))
+    index_size = os.path.getsize(os.path.join(out_dir, "index.json"))
+    print(f"완료: {out_dir} — 샤드 {count}개 (새로 씀 {written}, 삭제 {removed}), "
+          f"index.json {index_size / 1024:.1f}KB, 전체 {total / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,38 @@
 """
 BIBLE.csv(개역한글)에서 책별 단어를 추출해 data.js 퀴즈의 allWords를 보강합니다.
 - 풍성한 퍼즐을 위해 각 퀴즈의 title에서 책 이름을 추출하고, 해당 책 말씀에서 2~4글자 단어를 뽑아 추가합니다.
-- 사용: python3 enrich_data_from_bible.py [BIBLE.csv 경로]
+- 사용: python3 enrich_data_from_bible.py [BIBLE.csv 경로] [--merge] [--rebuild-cache] [--rank=freq]
 - 기본 BIBLE.csv 경로: 프로젝트 상위 폴더의 BIBLE.csv
+- BIBLE.csv는 처음 한 번만 .cache/bible.sqlite 구절 저장소(+ 단어 역색인)로 변환하고, 이후엔 저장소에서 읽음
+- 단어 선택은 기본 TF-IDF (책 안에서 자주 나오지만 다른 책에는 드문 단어 우선), --rank=freq는 단순 빈도
 """
 import os
 import re
 import csv
 import json
+import sqlite3
+import hashlib
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from quiz_db import (
+    cache_dir_for,
+    cached_quiz_records,
+    file_sha256,
+    iter_quiz_records,
+    load_database,
+    load_js_object,
+    read_text,
+    records_by_id,
+    tokenize,
+)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_JS = os.path.join(SCRIPT_DIR, 'data.js')
+EXTRA_JS = os.path.join(SCRIPT_DIR, 'data_bible_extra.js')
 # BIBLE.csv 기본 경로 (data.js와 같은 www 폴더)
 DEFAULT_BIBLE_CSV = os.path.join(SCRIPT_DIR, 'BIBLE.csv')
 
@@ -36,57 +58,241 @@ BOOK_NAME_ALIASES = {
 }
 
 # 가벼운 조사/접미사 제외 (2글자 이하 또는 퀴즈에 부적합한 토큰)
-SKIP_PATTERN = re.compile(
-    r'^(에|을|를|이|가|은|는|의|로|으로|와|과|에서|에게|한|하다|하시|되어|되어서|그리고|그러나|하나님의|그|이|저|것|수|등|및|또한|있다|없다|있다고|있다니|있다는)$'
+SKIP_WORDS = frozenset(
+    '에|을|를|이|가|은|는|의|로|으로|와|과|에서|에게|한|하다|하시|되어|되어서|그리고|그러나|하나님의|그|이|저|것|수|등|및|또한|있다|없다|있다고|있다니|있다는'.split('|')
 )
+WORD_RE = re.compile(r'[가-힣]{2,5}')
+# 추출 로직이 바뀌면 올려서 책별 단어 캐시 무효화
+EXTRACT_VERSION = 3
+
 
+def _to_int(s):
+    try:
+        return int(s)
+    except ValueError:
+        return int(float(s))  # "1.0" 같은 표기
 
-def parse_bible_csv(path):
-    """BIBLE.csv 파싱: 책 이름 66개, (book_id, chapter, verse) -> BIBLETEXT."""
-    book_names = [""] * 67  # 1-indexed
-    verses_by_book = {}  # book_id -> list of (chapter, verse, text)
 
+def iter_bible_csv(path):
+    """BIBLE.csv 스트리밍: (book, chapter, verse, text) 행을 차례로 생성. book 0 / chapter 10 행은 책 이름."""
     with open(path, "r", encoding="utf-8") as f:
         reader = csv.reader(f)
-        header = next(reader)
+        next(reader, None)  # header
         for row in reader:
             if len(row) < 4:
                 continue
             try:
-                book = int(float(row[0]))
-                chapter = int(float(row[1]))
-                verse = int(float(row[2]))
-                text = row[3].strip().strip('"')
-            except (ValueError, IndexError):
+                book, chapter, verse = _to_int(row[0]), _to_int(row[1]), _to_int(row[2])
+            except ValueError:
                 continue
+            yield book, chapter, verse, row[3].strip().strip('"')
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 구절 저장소 (.cache/bible.sqlite) — CSV를 한 번만 읽고 이후엔 (book, chapter, verse) 키로 바로 조회
+# - verses: 구절 본문 / words: 단어 -> 등장 구절 id 목록(postings)·문서 빈도
+# - book_terms: 책별 단어 빈도·책 안에서 처음 나오는 토큰 순번 (동점 순서용)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+VERSE_STORE_VERSION = 3
+
+
+def verse_id(book, chapter, verse):
+    """(book, chapter, verse) -> 정렬 가능한 정수 id (예: 창 1:1 -> 1001001)."""
+    return book * 1_000_000 + chapter * 1000 + verse
+
+
+def split_verse_id(vid):
+    return vid // 1_000_000, vid // 1000 % 1000, vid % 1000
+
+
+def _index_book(args):
+    """책 하나의 단어 -> 등장 구절 id 목록, 단어 -> 빈도 (Counter라 첫 등장 순서 유지 → 순번은 그 순서)."""
+    book, verses = args
+    postings = {}
+    tf = Counter()
+    for chapter, verse, text in sorted(verses):
+        tokens = WORD_RE.findall(text)
+        tf.update(tokens)
+        vid = verse_id(book, chapter, verse)
+        for t in set(tokens):
+            postings.setdefault(t, []).append(vid)
+    return book, postings, tf
+
+
+def build_word_index(conn, workers=None):
+    """verses 테이블로 역색인(words, book_terms) 생성. 책별 토큰화는 프로세스 풀에서 병렬 실행."""
+    by_book = {}
+    for book, chapter, verse, text in conn.execute("SELECT book, chapter, verse, text FROM verses"):
+        by_book.setdefault(book, []).append((chapter, verse, text))
+    jobs = sorted(by_book.items())
+    if workers == 1 or len(jobs) <= 1:
+        results = list(map(_index_book, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_index_book, jobs))
+
+    postings = {}
+    book_df = Counter()
+    for book, book_postings, tf in results:
+        conn.executemany("INSERT INTO book_terms VALUES (?, ?, ?, ?)",
+                         ((book, w, n, first) for first, (w, n) in enumerate(tf.items())))
+        for w, vids in book_postings.items():
+            postings.setdefault(w, []).extend(vids)
+            book_df[w] += 1
+    conn.executemany("INSERT INTO words VALUES (?, ?, ?, ?)", (
+        (w, len(vids), book_df[w], array("I", sorted(vids)).tobytes()) for w, vids in postings.items()
+    ))
+
+
+def build_verse_store(csv_path, db_path, workers=None):
+    """CSV를 스트리밍으로 읽어 SQLite 구절 저장소 + 단어 역색인 생성."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    tmp = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE books (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE verses (
+            book INTEGER NOT NULL, chapter INTEGER NOT NULL, verse INTEGER NOT NULL, text TEXT NOT NULL,
+            PRIMARY KEY (book, chapter, verse)
+        ) WITHOUT ROWID;
+        CREATE TABLE words (word TEXT PRIMARY KEY, df INTEGER NOT NULL, book_df INTEGER NOT NULL, postings BLOB NOT NULL);
+        CREATE TABLE book_terms (
+            book INTEGER NOT NULL, word TEXT NOT NULL, tf INTEGER NOT NULL, first INTEGER NOT NULL,
+            PRIMARY KEY (book, word)
+        ) WITHOUT ROWID;
+    """)
+    books = []
+
+    def verse_rows():
+        for book, chapter, verse, text in iter_bible_csv(csv_path):
             if book == 0 and chapter == 10 and 1 <= verse <= 66:
-                book_names[verse] = text
+                books.append((verse, text))
             elif 1 <= book <= 66 and text and not text.startswith("개역한글"):
-                verses_by_book.setdefault(book, []).append((chapter, verse, text))
-    return book_names, verses_by_book
-
-
-def extract_words_from_verses(verses, max_words_per_book=80, answer_len=(2, 5)):
-    """구절 리스트에서 2~5글자 한글 단어를 추출. (answer, clue) 리스트 반환."""
-    from collections import defaultdict
-    word_verses = defaultdict(list)  # word -> [(c,v,text), ...]
-    for c, v, text in verses:
-        tokens = re.findall(r'[가-힣]{2,5}', text)
-        for t in tokens:
-            if len(t) < answer_len[0] or len(t) > answer_len[1]:
-                continue
-            if SKIP_PATTERN.match(t):
-                continue
-            word_verses[t].append((c, v, text[:50]))
-    # 빈도 순으로 정렬해 상위 N개만, clue는 해당 단어가 나오는 첫 구절
+                yield book, chapter, verse, text
+
+    conn.executemany("INSERT OR REPLACE INTO verses VALUES (?, ?, ?, ?)", verse_rows())
+    conn.executemany("INSERT OR REPLACE INTO books VALUES (?, ?)", books)
+    build_word_index(conn, workers=workers)
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("version", str(VERSE_STORE_VERSION)),
+        ("source_sha256", file_sha256(csv_path)),
+    ])
+    conn.commit()
+    conn.close()
+    os.replace(tmp, db_path)
+
+
+def open_verse_store(csv_path, rebuild=False, workers=None):
+    """구절 저장소 연결 반환. CSV SHA-256이 다르거나 없으면 다시 생성."""
+    db_path = os.path.join(cache_dir_for(DATA_JS), "bible.sqlite")
+    sha = file_sha256(csv_path)
+    if not rebuild and os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError:
+            meta = {}
+        if meta.get("version") == str(VERSE_STORE_VERSION) and meta.get("source_sha256") == sha:
+            conn.execute("PRAGMA mmap_size = 268435456")
+            print("  ⚡ 구절 저장소 적중 (bible.sqlite)")
+            return conn
+        conn.close()
+    print("  🔄 구절 저장소·단어 역색인 생성 (BIBLE.csv 1회 스트리밍)")
+    build_verse_store(csv_path, db_path, workers=workers)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
+
+
+def verse_text(conn, book, chapter, verse):
+    """(book, chapter, verse) -> 본문 (기본키 조회, 없으면 None)."""
+    row = conn.execute(
+        "SELECT text FROM verses WHERE book = ? AND chapter = ? AND verse = ?", (book, chapter, verse)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def word_postings(conn, word):
+    """단어가 나오는 구절 id 목록 (정렬됨, 없으면 빈 array)."""
+    row = conn.execute("SELECT postings FROM words WHERE word = ?", (word,)).fetchone()
+    out = array("I")
+    if row:
+        out.frombytes(row[0])
+    return out
+
+
+def first_verse_in_book(conn, word, book):
+    """단어가 book 안에서 처음 나오는 구절 id (없으면 None)."""
+    vids = word_postings(conn, word)
+    i = bisect_left(vids, verse_id(book, 0, 0))
+    if i < len(vids) and vids[i] < verse_id(book + 1, 0, 0):
+        return vids[i]
+    return None
+
+
+def count_books(conn):
+    return conn.execute("SELECT COUNT(DISTINCT book) FROM book_terms").fetchone()[0] or 1
+
+
+def rank_book_words(conn, book, max_words_per_book=80, answer_len=(2, 5), rank="tfidf", n_books=None):
+    """역색인으로 책 하나의 단어를 골라 (answer, clue) 리스트 반환. 구절을 다시 훑지 않음.
+    rank="tfidf": 책 안 빈도 × log(전체 책 수 / 단어가 나오는 책 수) → 어느 책에나 나오는 '내가', '모든' 등은 뒤로 밀림
+    rank="freq": 책 안 빈도만 (이전 방식과 같은 단어·순서)
+    n_books: 전체 책 수 (여러 책을 돌 때는 count_books로 한 번만 세서 넘김)"""
+    if n_books is None:
+        n_books = count_books(conn)
+    scored = []
+    for word, tf, first, book_df in conn.execute(
+        "SELECT t.word, t.tf, t.first, w.book_df FROM book_terms t JOIN words w ON w.word = t.word WHERE t.book = ?",
+        (book,)
+    ):
+        if len(word) < answer_len[0] or len(word) > answer_len[1] or word in SKIP_WORDS:
+            continue
+        score = tf * math.log(n_books / book_df) if rank == "tfidf" else tf
+        if score > 0:
+            scored.append((score, first, word))
+    # 동점은 책 안에서 먼저 나온 단어 우선 (이전 Counter.most_common과 같은 순서), clue는 해당 단어가 나오는 첫 구절
+    scored.sort(key=lambda x: (-x[0], x[1]))
     result = []
-    for word, vlist in sorted(word_verses.items(), key=lambda x: -len(x[1]))[:max_words_per_book]:
-        c, v, snippet = vlist[0]
+    for _, _, word in scored[:max_words_per_book]:
+        snippet = verse_text(conn, *split_verse_id(first_verse_in_book(conn, word, book)))[:50]
         clue = f"말씀: {snippet}…" if len(snippet) >= 20 else snippet
         result.append({"answer": word, "clue": clue})
     return result
 
 
+def extract_words_by_book(bible_csv, max_words_per_book=60, answer_len=(2, 5), rank="tfidf", workers=None,
+                          rebuild=False):
+    """책 이름 -> [{answer, clue}, ...]. 단어 역색인(bible.sqlite)에서 책별로 점수를 매겨 고름.
+    결과는 (BIBLE.csv 해시, max_words_per_book, answer_len, rank) 키로 .cache/bible_words/에 저장 → 같은 조건이면 추출 생략."""
+    key = hashlib.sha256(json.dumps(
+        [EXTRACT_VERSION, file_sha256(bible_csv), max_words_per_book, list(answer_len), rank]
+    ).encode("utf-8")).hexdigest()[:20]
+    cache_path = os.path.join(cache_dir_for(DATA_JS), "bible_words", f"{key}.json")
+    if not rebuild and os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            print("  ⚡ 책별 단어 캐시 적중")
+            return json.load(f)
+
+    conn = open_verse_store(bible_csv, rebuild=rebuild, workers=workers)
+    words_by_book = {}
+    n_books = count_books(conn)
+    for bid, bname in conn.execute("SELECT id, name FROM books ORDER BY id").fetchall():
+        words = rank_book_words(conn, bid, max_words_per_book, answer_len, rank, n_books)
+        if words:
+            words_by_book[bname] = words
+    conn.close()
+    print(f"  🔄 책별 단어 추출 ({len(words_by_book)}권, {rank})")
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(words_by_book, f, ensure_ascii=False)
+    return words_by_book
+
+
 def get_book_from_title(title):
     """title '창세기: 천지창조' -> '창세기'."""
     if ":" in title:
@@ -98,49 +304,108 @@ def get_book_from_title(title):
 
 
 def load_quiz_database_js(path):
-    """data.js에서 QUIZ_DATABASE 블록을 파싱해 퀴즈별 id, title, allWords 반환. (간단 파싱)"""
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
+    """data.js에서 QUIZ_DATABASE 블록을 파싱해 퀴즈별 id, title, allWords 반환. (quiz_db 공용 토크나이저 + 캐시)"""
+    content = read_text(path)
     quizzes = []
-    # "  \"id\": {" 패턴으로 퀴즈 시작 찾기
-    for m in re.finditer(r'\s*"([a-z0-9_]+)"\s*:\s*\{', content):
-        qid = m.group(1)
-        start = m.end()
-        depth = 1
-        i = start
-        while i < len(content) and depth > 0:
-            if content[i] == "{":
-                depth += 1
-            elif content[i] == "}":
-                depth -= 1
-            i += 1
-        block = content[start : i - 1]
-        title_m = re.search(r'title\s*:\s*"([^"]+)"', block)
-        title = title_m.group(1) if title_m else ""
-        all_words = []
-        for wm in re.finditer(r'\{\s*clue\s*:\s*"([^"]*)"\s*,\s*answer\s*:\s*"([^"]*)"\s*\}', block):
-            all_words.append({"clue": wm.group(1), "answer": wm.group(2)})
-        quizzes.append({"id": qid, "title": title, "allWords": all_words, "block_start": start, "block_end": i - 1})
+    for rec in cached_quiz_records(path):
+        block_start, block_end = rec["span"]
+        words_start, words_end = rec["words_span"] or (None, None)
+        all_words = [w for w in rec["allWords"] if w["answer"]]
+        quizzes.append({"id": rec["id"], "title": rec["title"], "allWords": all_words,
+                        "block_start": block_start + 1, "block_end": block_end - 1,
+                        "words_start": words_start, "words_end": words_end})
     return quizzes, content
 
 
+def format_word_js(w):
+    """data.js 스타일 한 줄: { clue: "...", answer: "..." }"""
+    clue = json.dumps(w["clue"], ensure_ascii=False)
+    answer = json.dumps(w["answer"], ensure_ascii=False)
+    return f"{{ clue: {clue}, answer: {answer} }}"
+
+
+def merge_into_data_js(quizzes, content, to_add):
+    """to_add(퀴즈 id -> 단어 리스트)를 data.js 각 퀴즈 allWords 끝에 삽입한 새 내용 반환.
+    삽입 위치는 원본 기준으로 한 번에 모은 뒤, 앞에서부터 조각을 이어 붙여 한 번에 만듦 (오프셋 밀림 없음).
+    중복 id는 JS와 같이 마지막 정의에만 삽입하고, 이미 있는 answer는 건너뜀. 결과는 다시 파싱해 검증."""
+    last_by_id = {q["id"]: q for q in quizzes}
+    inserts = []  # (원본 위치, 삽입 문자열)
+    expected = {}  # 퀴즈 id -> 병합 후 answer 목록
+    for qid, words in to_add.items():
+        q = last_by_id.get(qid)
+        if not q or q["words_start"] is None:
+            continue
+        existing = {w["answer"] for w in q["allWords"]}
+        new_words = []
+        for w in words:
+            if w["answer"] and w["answer"] not in existing:
+                new_words.append(w)
+                existing.add(w["answer"])
+        if not new_words:
+            continue
+        # 배열 안 마지막 토큰 다음에 삽입 (닫는 ']' 앞 들여쓰기·주석 보존)
+        tokens = []
+        for tok in tokenize(content, q["words_start"] + 1):
+            if tok[2] >= q["words_end"] - 1:
+                break
+            tokens.append(tok)
+        pos = tokens[-1][3] if tokens else q["words_start"] + 1
+        sep = ",\n      " if tokens and tokens[-1][1] != "," else "\n      "
+        inserts.append((pos, sep + ",\n      ".join(format_word_js(w) for w in new_words)))
+        expected[qid] = [w["answer"] for w in q["allWords"]] + [w["answer"] for w in new_words]
+
+    inserts.sort()
+    pieces, prev = [], 0
+    for pos, text in inserts:
+        pieces.append(content[prev:pos])
+        pieces.append(text)
+        prev = pos
+    pieces.append(content[prev:])
+    new_content = "".join(pieces)
+
+    # 검증: 다시 파싱해서 병합 대상은 기존 + 추가, 나머지는 그대로인지 확인
+    before = records_by_id(iter_quiz_records(content))
+    after = records_by_id(iter_quiz_records(new_content))
+    if set(before) != set(after):
+        raise ValueError("병합 검증 실패: 퀴즈 id 목록이 달라졌습니다")
+    for qid, rec in after.items():
+        old = before[qid]
+        if any(rec[k] != old[k] for k in ("title", "category", "meta", "config")):
+            raise ValueError(f"병합 검증 실패: {qid} 메타 정보가 달라졌습니다")
+        answers = [w["answer"] for w in rec["allWords"] if w["answer"]]
+        want = expected.get(qid, [w["answer"] for w in old["allWords"] if w["answer"]])
+        if answers != want:
+            raise ValueError(f"병합 검증 실패: {qid} allWords 불일치")
+    return new_content, sum(len(v) - len(last_by_id[k]["allWords"]) for k, v in expected.items())
+
+
+def write_extra_js(to_add):
+    with open(EXTRA_JS, "w", encoding="utf-8") as f:
+        f.write("/** BIBLE.csv에서 추출한 추가 단어. data.js 로드 후 각 퀴즈 allWords에 concat 하세요. */\n")
+        f.write("const BIBLE_EXTRA_WORDS = ")
+        f.write(json.dumps(to_add, ensure_ascii=False, indent=2))
+        f.write(";\n")
+
+
 def main():
     import sys
-    bible_csv = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BIBLE_CSV
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    bible_csv = args[0] if args else DEFAULT_BIBLE_CSV
+    if "--rebuild-cache" in sys.argv:
+        load_database(DATA_JS, rebuild=True)
+    merge = "--merge" in sys.argv
     if not os.path.exists(bible_csv):
+        if merge and os.path.exists(EXTRA_JS):
+            # BIBLE.csv 없이도 기존 data_bible_extra.js 내용을 data.js에 병합
+            merge_data_js(load_js_object(EXTRA_JS, "BIBLE_EXTRA_WORDS"))
+            return
         print(f"BIBLE.csv를 찾을 수 없습니다: {bible_csv}")
         print("사용: python3 enrich_data_from_bible.py /path/to/BIBLE.csv")
         return
-    book_names, verses_by_book = parse_bible_csv(bible_csv)
-    book_name_by_id = {i: book_names[i] for i in range(1, 67) if book_names[i]}
-
     # 책별 추출 단어 (책 이름 -> [ {answer, clue}, ... ])
-    words_by_book = {}
-    for bid, bname in book_name_by_id.items():
-        verses = verses_by_book.get(bid, [])
-        if not verses:
-            continue
-        words_by_book[bname] = extract_words_from_verses(verses, max_words_per_book=60)
+    rank = "freq" if "--rank=freq" in sys.argv else "tfidf"
+    words_by_book = extract_words_by_book(bible_csv, max_words_per_book=60, rank=rank,
+                                          rebuild="--rebuild-cache" in sys.argv)
 
     quizzes, full_content = load_quiz_database_js(DATA_JS)
     existing_answers = {}  # qid -> set of answer
@@ -165,58 +430,30 @@ def main():
         if added:
             to_add[q["id"]] = added
 
-    # data.js에 삽입: 각 퀴즈 블록의 allWords 배열 안, 마지막 항목 다음에 추가
-    # (원본 파일 수정이 복잡하므로, 추가할 allWords만 출력하고 사용자가 수동 병합하거나
-    #  별도 병합 스크립트를 돌리게 할 수 있음. 여기서는 새 data.js를 생성하는 방식으로 함.)
-    # 실제로 data.js를 직접 수정하면 9000줄이라 위험하므로, "추가용 패치" JS를 생성합니다.
-    out_path = os.path.join(SCRIPT_DIR, "data_bible_extra.js")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("/** BIBLE.csv에서 추출한 추가 단어. data.js 로드 후 각 퀴즈 allWords에 concat 하세요. */\n")
-        f.write("const BIBLE_EXTRA_WORDS = ")
-        f.write(json.dumps(to_add, ensure_ascii=False, indent=2))
-        f.write(";\n")
+    if merge:
+        merge_data_js(to_add, quizzes, full_content)
+        return
+
+    write_extra_js(to_add)
     total_words = sum(len(v) for v in to_add.values())
     print(f"완료: data_bible_extra.js 생성 — {len(to_add)}개 퀴즈, {total_words}개 단어 추가 (play.html에서 자동 병합)")
 
-    # 옵션: --merge 로 data.js를 실제로 수정할지
-    if "--merge" in sys.argv:
-        # data.js 내 각 퀴즈 블록에서 allWords: [ ... ] 부분을 찾아 교체
-        import copy
-        new_content = full_content
-        for q in quizzes:
-            qid = q["id"]
-            if qid not in to_add:
-                continue
-            # 이 퀴즈 블록에서 allWords: [ 까지 찾고, 그 다음 ] 직전에 새 항목 삽입
-            block = full_content[q["block_start"]:q["block_end"]]
-            pos = block.find("allWords: [")
-            if pos == -1:
-                continue
-            insert_pos = q["block_start"] + pos + len("allWords: [")
-            # 기존 마지막 항목 다음 위치 찾기 (마지막 }\n 다음)
-            search_start = insert_pos
-            depth = 0
-            i = search_start
-            while i < len(new_content):
-                if new_content[i] == "[":
-                    depth += 1
-                elif new_content[i] == "]":
-                    depth -= 1
-                    if depth == 0:
-                        break
-                i += 1
-            end_of_array = i
-            # 마지막 ] 직전에 콤마 + 새 항목들 삽입
-            new_entries = ",\n      ".join(
-                f'{{ clue: "{w["clue"].replace(chr(92), chr(92)+chr(92)).replace('"', '\\"')}", answer: "{w["answer"]}" }}'
-                for w in to_add[qid]
-            )
-            if new_entries:
-                insert_text = ",\n      " + new_entries
-                new_content = new_content[:end_of_array] + insert_text + new_content[end_of_array:]
-            # 다음 퀴즈 block_start/end가 밀리므로, 한 번에 하나씩 하지 말고 오프셋을 두고 한 번에 치환
-        # merge 시 오프셋이 바뀌므로, 퀴즈를 역순으로 처리하거나 한 번에 모든 삽입 위치를 계산
-        print("--merge는 현재 단순 삽입 시 오프셋 문제로 비활성화. data_bible_extra.js만 사용하세요.")
+
+def merge_data_js(to_add, quizzes=None, content=None):
+    """--merge: 추가 단어를 data.js에 직접 병합하고, data_bible_extra.js는 빈 객체로 비움 (런타임 concat 불필요)."""
+    if quizzes is None:
+        quizzes, content = load_quiz_database_js(DATA_JS)
+    try:
+        new_content, added = merge_into_data_js(quizzes, content, to_add)
+    except ValueError as e:
+        print(f"❌ {e} — data.js를 수정하지 않았습니다.")
+        return
+    tmp = DATA_JS + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(new_content)
+    os.replace(tmp, DATA_JS)
+    write_extra_js({})
+    print(f"완료: data.js에 {added}개 단어 병합 (data_bible_extra.js는 비움)")
 
 
 if __name__ == "__main__":
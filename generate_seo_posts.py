@@ -4,71 +4,34 @@ SEO 게시글 일괄 생성 (data.js 기반)
 - posts/*.html 287개 생성
 - posts.xml (사이트맵)
 - posts/index.html (목록)
+- 옵션: --rebuild-cache (data.js 파싱 캐시 강제 재생성)
 """
 import os
 import re
+import sys
 import random
 from datetime import datetime
 from html import escape
 
+from quiz_db import cached_quiz_records, load_database
+
 DOMAIN = "https://crossero.com"
 LASTMOD = "2026-02-14"
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 1. data.js 파싱
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-def find_matching_brace(text, start_pos, open_c, close_c):
-    depth = 0
-    for i in range(start_pos, len(text)):
-        if text[i] == open_c:
-            depth += 1
-        elif text[i] == close_c:
-            depth -= 1
-            if depth == 0:
-                return i
-    return -1
-
 def parse_data_js(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    """data.js -> [{id, title, category, hints}] (소스 순서, 중복 id 포함). 파싱은 quiz_db 공용 토크나이저 + 캐시."""
     puzzles = []
-    # "id": { ... }, 패턴 찾기 (키만 따옴표)
-    pattern = re.compile(r'"([a-zA-Z0-9_]+)"\s*:\s*\{')
-    pos = 0
-    while True:
-        m = pattern.search(content, pos)
-        if not m:
-            break
-        pid = m.group(1)
-        start = m.end() - 1  # '{' 위치
-        end = find_matching_brace(content, start, '{', '}')
-        if end == -1:
-            pos = m.end()
-            continue
-        block = content[start:end+1]
-        # title: "..." 추출
-        t = re.search(r'title:\s*"([^"]*)"', block)
-        title = t.group(1) if t else pid
-        # category: "..." 추출
-        c = re.search(r'category:\s*"([^"]*)"', block)
-        category = c.group(1) if c else "성경"
-        # allWords: [ ... ] 추출 후 clue, answer 파싱 (block 내에서)
-        aw = re.search(r'allWords:\s*\[', block)
-        hints = []
-        if aw:
-            arr_start = aw.end() - 1  # '[' 위치
-            arr_end = find_matching_brace(block, arr_start, '[', ']')
-            if arr_end != -1:
-                arr_content = block[arr_start:arr_end+1]
-                for hint_m in re.finditer(r'clue:\s*"([^"]*)"', arr_content):
-                    hints.append(f"{len(hints)+1}. {hint_m.group(1)}")
+    for rec in cached_quiz_records(filepath):
+        hints = [f"{i}. {w['clue']}" for i, w in enumerate(rec['allWords'], 1)]
         puzzles.append({
-            'id': pid,
-            'title': title,
-            'category': category,
+            'id': rec['id'],
+            'title': rec['title'] or rec['id'],
+            'category': rec['category'] or "성경",
             'hints': hints,
         })
-        pos = end + 1
     return puzzles
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -201,6 +164,8 @@ def main():
     os.makedirs(posts_dir, exist_ok=True)
 
     print("data.js 파싱 중...")
+    if '--rebuild-cache' in sys.argv:
+        load_database(data_js, rebuild=True)
     puzzles = parse_data_js(data_js)
     # 중복 id 제거 (마지막 것만 유지)
     seen = {}
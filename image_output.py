@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+이미지 저장 형식 (social_export 카드 / 블로그 퍼즐 이미지 공용)
+- PNG는 팔레트(P) 모드: 색이 256개 이하면 그 색 그대로(무손실), 넘으면 적응형 팔레트(median cut, 디더링 없음)로 줄임
+  (보드·카드는 단색 칸과 글자 테두리 정도라 눈으로는 차이가 없음). 투명 픽셀이 있는 그림은 RGBA 팔레트
+- zlib 압축 단계: IMAGE_PNG_LEVEL (0~9). 지정하지 않으면 단계 9 + 팔레트 PNG는 optimize(가장 작은 파일)
+  Pillow는 optimize가 켜지면 compress_level을 무시하므로, 단계를 지정하면(환경 변수·level 인자) optimize 없이 그 단계로 저장
+- IMAGE_WEBP=1 이면 같은 이름의 무손실 .webp도 함께 저장 (PNG와 같은 픽셀)
+- IMAGE_PALETTE=0 이면 팔레트 변환 없이 원래 모드 그대로 PNG
+- ImageStats: 예전 방식(원래 모드, 기본 설정 PNG) 대비 바이트 수를 모아 줄어든 양을 보고
+- 사용: python3 image_output.py <PNG 파일/폴더...>  → 지금 설정으로 다시 저장했을 때 크기 보고 (파일은 그대로)
+"""
+import io
+import os
+import sys
+
+from PIL import Image, features
+
+PNG_LEVEL = int(os.environ['IMAGE_PNG_LEVEL']) if os.environ.get('IMAGE_PNG_LEVEL') else None
+PALETTE = os.environ.get('IMAGE_PALETTE', '1') != '0'
+WEBP = os.environ.get('IMAGE_WEBP', '0') == '1'
+MAX_COLORS = 256
+
+
+def to_palette(img):
+    """P 모드 그림. 256색 이하면 그 색 그대로, 넘으면 적응형 256색."""
+    if img.mode == 'P':
+        return img
+    if img.mode in ('RGBA', 'LA') and img.getchannel('A').getextrema()[0] < 255:
+        return img.convert('RGBA').quantize(MAX_COLORS, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    rgb = img.convert('RGB')
+    colors = rgb.getcolors(MAX_COLORS)
+    if colors is None:
+        return rgb.quantize(MAX_COLORS, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    # 색 수만큼의 median cut 상자 → 상자마다 한 색이라 그대로 보존
+    return rgb.convert('P', palette=Image.Palette.ADAPTIVE, colors=len(colors))
+
+
+def encode_png(img, palette=None, level=None):
+    """PNG 바이트 (palette·level 기본값은 IMAGE_PALETTE·IMAGE_PNG_LEVEL). 단계가 없으면 9 + 팔레트면 optimize."""
+    if PALETTE if palette is None else palette:
+        img = to_palette(img)
+    if level is None:
+        level = PNG_LEVEL
+    buf = io.BytesIO()
+    if level is None:
+        img.save(buf, format='PNG', compress_level=9, optimize=img.mode == 'P')
+    else:
+        img.save(buf, format='PNG', compress_level=level)
+    return buf.getvalue()
+
+
+def encode_webp(img, palette=None):
+    """무손실 WebP 바이트 (팔레트를 쓰면 PNG와 같은 픽셀)."""
+    if PALETTE if palette is None else palette:
+        img = to_palette(img)
+    buf = io.BytesIO()
+    img.save(buf, format='WEBP', lossless=True, method=4)
+    return buf.getvalue()
+
+
+def baseline_png_size(img):
+    """예전 방식 PNG (원래 모드, Pillow 기본 압축) 크기."""
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return len(buf.getvalue())
+
+
+def write_image(data, path, aliases=()):
+    """data를 path에 쓰고 (내용이 같으면 그대로 둠) aliases는 path의 하드링크로. 하드링크가 안 되는 파일 시스템이면 복사."""
+    path = str(path)
+    if not (os.path.exists(path) and os.path.getsize(path) == len(data) and _read(path) == data):
+        tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    for alias in map(str, aliases):
+        if os.path.exists(alias):
+            if os.path.samefile(alias, path):
+                continue
+            os.remove(alias)
+        try:
+            os.link(path, alias)
+        except OSError:
+            with open(alias, 'wb') as f:
+                f.write(data)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def webp_path(path):
+    return os.path.splitext(str(path))[0] + '.webp'
+
+
+class ImageStats:
+    """저장한 이미지의 바이트 합계. measure=True면 예전 방식 PNG 크기도 재서 줄어든 양을 계산 (인코딩 한 번 더)."""
+
+    def __init__(self, measure=True):
+        self.measure = measure
+        self.files = 0
+        self.baseline = 0
+        self.png = 0
+        self.webp = 0
+
+    def add(self, img, png_size, webp_size=0):
+        self.files += 1
+        self.png += png_size
+        self.webp += webp_size
+        if self.measure:
+            self.baseline += baseline_png_size(img)
+
+    def report(self):
+        line = f"이미지 {self.files}개: PNG {self.png / 1024:.0f}KB"
+        if self.measure and self.baseline:
+            saved = self.baseline - self.png
+            line += f" (기존 {self.baseline / 1024:.0f}KB 대비 {saved / 1024:.0f}KB, {saved / self.baseline:.0%} 절약)"
+        if self.webp:
+            line += f", WebP {self.webp / 1024:.0f}KB"
+        return line
+
+
+_warned_webp = False
+
+
+def save_image(img, path, aliases=(), stats=None, webp=None):
+    """PNG(팔레트·압축 설정 적용)로 한 번 인코딩해 path에 저장, aliases는 하드링크.
+    webp(기본 IMAGE_WEBP)면 path·aliases 옆에 같은 이름의 .webp도 저장. 저장한 PNG 바이트 수 반환."""
+    global _warned_webp
+    out = to_palette(img) if PALETTE else img
+    data = encode_png(out, palette=False)
+    write_image(data, path, aliases)
+    webp_size = 0
+    if WEBP if webp is None else webp:
+        if features.check('webp'):
+            webp_data = encode_webp(out, palette=False)
+            write_image(webp_data, webp_path(path), [webp_path(a) for a in aliases])
+            webp_size = len(webp_data)
+        elif not _warned_webp:
+            _warned_webp = True
+            print("⚠️ 이 Pillow는 WebP를 지원하지 않아 .webp 생략")
+    if stats is not None:
+        stats.add(img, len(data), webp_size)
+    return len(data)
+
+
+def main():
+    paths = []
+    for arg in (a for a in sys.argv[1:] if not a.startswith('--')):
+        if os.path.isdir(arg):
+            paths += [os.path.join(root, n) for root, _, names in os.walk(arg) for n in names if n.endswith('.png')]
+        else:
+            paths.append(arg)
+    if not paths:
+        print("사용: python3 image_output.py <PNG 파일/폴더...>")
+        return 2
+    on_disk = 0
+    stats = ImageStats(measure=False)
+    for p in sorted(paths):
+        with Image.open(p) as img:
+            img.load()
+            stats.add(img, len(encode_png(img)), len(encode_webp(img)) if WEBP else 0)
+        on_disk += os.path.getsize(p)
+    saved = on_disk - stats.png
+    print(f"{stats.report()} — 지금 파일 {on_disk / 1024:.0f}KB, 다시 저장하면 {saved / 1024:.0f}KB "
+          f"({saved / on_disk:.0%}) 줄어듦" if on_disk else stats.report())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+블로그 발행용 퍼즐 내보내기 (Python 엔진, 브라우저 불필요)
+- play2.html?export=1 과 같은 형식: 퍼즐 PNG(빈 칸 + 번호), g= 값(play2.html?play=1&g=), 번호 붙은 힌트 JSON
+- 단어 풀·목표 개수는 play2.html export 모드와 같은 규칙 (같은 접두어 퀴즈 통합, 15개 미만이면 성경일반, 최소 12단어)
+- 배치는 play2.html이 아니라 social_export/social_batch_export.py의 build_layout (퍼즐 id 고정 시드 → 같은 퀴즈는 같은 이미지)
+  이라 격자 모양은 브라우저 결과와 다름. 같은 정답은 한 번만 놓고, 같은 방향 단어 위에 겹쳐 놓지 않음
+- 사용: python3 puzzle_export.py <퀴즈 id> [PNG 경로]
+        python3 puzzle_export.py --check [--engine=search]  → 모든 퀴즈를 만들어 check_export 문제가 있으면 종료 코드 1
+"""
+import os
+import sys
+import json
+import base64
+from urllib.parse import quote
+
+from PIL import Image, ImageDraw
+
+from image_output import save_image
+from quiz_db import DATA_JS, SCRIPT_DIR, cached_quiz_records, records_by_id
+
+sys.path.insert(0, os.path.join(SCRIPT_DIR, 'social_export'))
+from social_batch_export import (  # noqa: E402
+    SIZE,
+    PuzzleData,
+    build_layout,
+    default_seed,
+    font_file,
+    pick_font,
+    stacked_cells,
+    target_count,
+    usable_words,
+)
+
+# play2.html export 모드와 같은 값
+EXPORT_CELL = 60
+EXPORT_MIN_POOL = 15
+EXPORT_MIN_TARGET = 12
+FALLBACK_CATEGORY = '성경일반'
+
+
+def combined_words(records, match):
+    """match(id, 레코드)가 참인 퀴즈들의 allWords를 소스 순서로 합침 (answer::clue 중복 제거). play2.html getCombinedWordsBy*와 동일."""
+    out = []
+    seen = set()
+    for qid, rec in records.items():
+        if not match(qid, rec):
+            continue
+        for w in rec['allWords']:
+            key = (w['answer'], w['clue'])
+            if key not in seen:
+                seen.add(key)
+                out.append(w)
+    return out
+
+
+def export_word_pool(pid, records):
+    """play2.html export 모드의 단어 풀: 같은 접두어 퀴즈 통합 → 15개 미만이면 성경일반 카테고리."""
+    rec = records[pid]
+    prefix = pid.split('_')[0]
+    pool = combined_words(records, lambda qid, r: qid.startswith(prefix + '_'))
+    if len(pool) <= len(rec['allWords']):
+        pool = rec['allWords']
+    if len(pool) < EXPORT_MIN_POOL:
+        fallback = combined_words(records, lambda qid, r: FALLBACK_CATEGORY in (r['category'] or ''))
+        if len(fallback) >= EXPORT_MIN_POOL:
+            pool = fallback
+    return pool
+
+
+def export_target(pool_size):
+    """목표 단어 수: target_count, 단 최소 12 (풀이 작으면 풀 크기)."""
+    target = target_count(pool_size)
+    if target < EXPORT_MIN_TARGET:
+        target = min(EXPORT_MIN_TARGET, pool_size)
+    return target
+
+
+def build_export_puzzle(pid, seed=None, engine='greedy', data_js=DATA_JS):
+    """퀴즈 id -> BuiltPuzzle (play2.html export와 같은 단어 풀·목표 개수)."""
+    records = records_by_id(cached_quiz_records(data_js))
+    if pid not in records:
+        raise KeyError(f"Puzzle id not found: {pid}")
+    words = usable_words(export_word_pool(pid, records))
+    if not words:
+        raise ValueError(f"No usable words in puzzle: {pid}")
+    data = PuzzleData(puzzle_id=pid, title=records[pid]['title'] or pid, words=words)
+    if seed is None:
+        seed = default_seed(pid)
+    # play2.html?play=1&g= 는 15x15 격자만 읽으므로 자동 크기 대신 SIZE 고정
+    return build_layout(data, seed, engine, target=export_target(len(words)), size=SIZE)
+
+
+def render_export_png(built, cell=EXPORT_CELL):
+    """play2.html export 캔버스와 같은 그림: 빈 칸은 흰색, 나머지는 회색, 단어 시작 칸에 파란 번호."""
+    size = len(built.solution)
+    img = Image.new('RGB', (size * cell, size * cell), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    num_font = pick_font(13, bold=True)
+    for y in range(size):
+        for x in range(size):
+            active = built.solution[y][x] is not None
+            x0, y0 = x * cell, y * cell
+            # 캔버스 0.5px 테두리(#aaaaaa / #444444)는 1px 반투명 선으로 보이므로 칸 색과 섞은 색으로 그림
+            draw.rectangle([x0, y0, x0 + cell, y0 + cell], fill=(255, 255, 255) if active else (85, 85, 85),
+                           outline=(212, 212, 212) if active else (76, 76, 76))
+            num = built.number_map[y][x]
+            if active and num:
+                draw.rectangle([x0 + 1, y0 + 1, x0 + 18, y0 + 16], fill=(255, 255, 255))
+                draw.text((x0 + 2, y0 + 2), str(num), font=num_font, fill=(0, 115, 230))
+    return img
+
+
+def encode_play_g(built):
+    """play2.html encodePuzzleG()와 같은 값: 정답 격자('.' = 빈 칸) + '|' + 'num,y,x;...' 를 base64 후 URI 인코딩."""
+    size = len(built.solution)
+    s_str = ''.join(c if c is not None else '.' for row in built.solution for c in row)
+    n_parts = [f"{built.number_map[y][x]},{y},{x}"
+               for y in range(size) for x in range(size) if built.number_map[y][x] is not None]
+    b64 = base64.b64encode(f"{s_str}|{';'.join(n_parts)}".encode('utf-8')).decode('ascii')
+    return quote(b64, safe='')
+
+
+def export_hints(built):
+    """번호 붙은 힌트 {a: [{n, c}], d: [...]} (play2.html __puzzleExportHints와 같은 형태)."""
+    return {
+        'a': [{'n': q.num, 'c': q.clue} for q in sorted(built.across, key=lambda q: q.num)],
+        'd': [{'n': q.num, 'c': q.clue} for q in sorted(built.down, key=lambda q: q.num)],
+    }
+
+
+def check_export(built):
+    """발행하면 안 되는 배치 문제 목록 (없으면 빈 리스트): 한 방향에 같은 번호가 두 번, 같은 정답이 두 번,
+    같은 방향 두 단어가 함께 지나가는 칸 (stacked_cells, 일부만 겹쳐도)."""
+    problems = []
+    for key, words in (('가로', built.across), ('세로', built.down)):
+        nums = [q.num for q in words]
+        problems += [f"{key} {n}번이 {nums.count(n)}개" for n in sorted(set(nums)) if nums.count(n) > 1]
+    answers = [q.answer for q in built.across + built.down]
+    problems += [f"정답 '{a}'가 {answers.count(a)}번" for a in sorted(set(answers)) if answers.count(a) > 1]
+    problems += [f"({x},{y}) {'가로' if d == 'across' else '세로'} 단어 겹침" for x, y, d in stacked_cells(built)]
+    return problems
+
+
+def check_number_font():
+    """번호 글꼴(굵은 13px)을 찾지 못해 Pillow 기본 글꼴(10px)로 그리게 되면 경고 메시지, 괜찮으면 None."""
+    if font_file(bold=True):
+        return None
+    return ("No bold font for puzzle numbers; falling back to Pillow's 10px default font. "
+            "Install one, e.g. `sudo apt install fonts-dejavu-core` or `fonts-noto-cjk`.")
+
+
+def check_all(engine='greedy', data_js=DATA_JS):
+    """모든 퀴즈의 발행용 배치를 만들어 check_export. (퀴즈 수, {id: 문제 목록}, 가로 단어 수, 세로 단어 수, 교차 칸 수) 반환."""
+    failed = {}
+    count = across = down = crossings = 0
+    for pid in records_by_id(cached_quiz_records(data_js)):
+        try:
+            built = build_export_puzzle(pid, engine=engine, data_js=data_js)
+        except (KeyError, ValueError):
+            continue
+        count += 1
+        problems = check_export(built)
+        if problems:
+            failed[pid] = problems
+        across += len(built.across)
+        down += len(built.down)
+        crossings += len({(q.x + i, q.y) for q in built.across for i in range(len(q.answer))}
+                         & {(q.x, q.y + i) for q in built.down for i in range(len(q.answer))})
+    return count, failed, across, down, crossings
+
+
+def export_puzzle_image(pid, out_path, seed=None, engine='greedy', stats=None):
+    """퍼즐 PNG 저장 (image_output 형식, stats에 바이트 합계) + (가로 힌트, 세로 힌트, g= 값, 힌트 JSON 문자열) 반환."""
+    built = build_export_puzzle(pid, seed=seed, engine=engine)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    save_image(render_export_png(built), out_path, stats=stats)
+    hints = export_hints(built)
+    across = [h['c'] for h in hints['a']]
+    down = [h['c'] for h in hints['d']]
+    return across, down, encode_play_g(built), json.dumps(hints, ensure_ascii=False, separators=(',', ':'))
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if '--check' in sys.argv:
+        engine = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--engine=')), 'greedy')
+        count, failed, across, down, crossings = check_all(engine)
+        for pid, problems in failed.items():
+            print(f"  ❌ {pid}: {', '.join(problems)}")
+        print(f"{engine}: 퀴즈 {count}개 중 문제 {len(failed)}개 — 가로 {across}, 세로 {down}, 교차 {crossings}칸")
+        return 1 if failed else 0
+    if not args:
+        print("사용: python3 puzzle_export.py <퀴즈 id> [PNG 경로]")
+        return 2
+    font_warning = check_number_font()
+    if font_warning:
+        print(f"⚠️ {font_warning}")
+    pid = args[0]
+    out_path = args[1] if len(args) > 1 else f"{pid}.png"
+    across, down, play_g, _ = export_puzzle_image(pid, out_path)
+    print(f"완료: {out_path} — 가로 {len(across)}개, 세로 {len(down)}개, 격자 {SIZE}x{SIZE}, g= {len(play_g)}자")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+data.js 공용 파서 (QUIZ_DATABASE 리터럴 1회 스캔)
+- 토크나이저가 문자열·주석을 정확히 건너뛰므로 힌트 안의 중괄호/대괄호에도 안전
+- 파일 전체를 한 번만 선형으로 읽어 퀴즈 레코드(id, title, category, meta, config, allWords)를 돌려줌
+- generate_seo_posts / auto_publish_with_images / enrich_data_from_bible / social_export 공용
+- 파싱 결과는 .cache/quiz_db.json 에 저장 (data.js·data_bible_extra.js SHA-256이 바뀔 때만 재생성)
+- 퀴즈 1개만 필요할 때는 .cache/quiz_index.json(바이트 오프셋) + mmap 으로 해당 구간만 읽음
+- 사용: python3 quiz_db.py [--rebuild-cache]
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import hashlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_JS = os.path.join(SCRIPT_DIR, 'data.js')
+EXTRA_JS = os.path.join(SCRIPT_DIR, 'data_bible_extra.js')
+CACHE_VERSION = 2
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 1. 토크나이저
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<num>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,=;])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPE_RE = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|.)', re.DOTALL)
+_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+_KEYWORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+def _unescape(m):
+    e = m.group(1)
+    if e[0] == 'u':
+        return chr(int(e[2:-1] if e[1] == '{' else e[1:], 16))
+    if e[0] == 'x':
+        return chr(int(e[1:], 16))
+    if e in ('\n', '\r', '\r\n', '\u2028', '\u2029'):
+        return ''  # 줄 이어쓰기
+    return _SIMPLE_ESCAPES.get(e, e)
+
+
+def _unquote(raw):
+    body = raw[1:-1]
+    if '\\' not in body:
+        return body
+    return _ESCAPE_RE.sub(_unescape, body)
+
+
+def tokenize(text, pos=0):
+    """JS 소스에서 (종류, 값, 시작, 끝) 토큰을 차례로 생성. 공백·주석은 건너뜀."""
+    match = _TOKEN_RE.match
+    n = len(text)
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        if kind != 'ws' and kind != 'comment':
+            yield kind, m.group(), pos, m.end()
+        pos = m.end()
+
+
+def _line_of(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 2. 객체 리터럴 파서
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+class _Parser:
+    """토큰 스트림 위의 재귀 하강 파서 (JSON + JS 객체 리터럴 부분집합)."""
+
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.tokens = tokenize(text, pos)
+        self.tok = None
+        self.last_end = pos  # 마지막으로 소비한 토큰의 끝 위치
+        self.advance()
+
+    def advance(self):
+        if self.tok:
+            self.last_end = self.tok[3]
+        self.tok = next(self.tokens, None)
+        return self.tok
+
+    def error(self, msg):
+        pos = self.tok[2] if self.tok else len(self.text)
+        return ValueError(f"data.js 파싱 오류 ({_line_of(self.text, pos)}행): {msg}")
+
+    def expect(self, value):
+        if not self.tok or self.tok[1] != value:
+            got = self.tok[1] if self.tok else 'EOF'
+            raise self.error(f"'{value}' 필요, '{got}' 발견")
+        tok = self.tok
+        self.advance()
+        return tok
+
+    def key(self):
+        if not self.tok:
+            raise self.error("키 필요, EOF 발견")
+        kind, value = self.tok[0], self.tok[1]
+        self.advance()
+        if kind == 'str':
+            return _unquote(value)
+        if kind in ('name', 'num'):
+            return value
+        raise self.error(f"잘못된 키 '{value}'")
+
+    def value(self):
+        if not self.tok:
+            raise self.error("값 필요, EOF 발견")
+        kind, value = self.tok[0], self.tok[1]
+        if value == '{':
+            return self.obj()
+        if value == '[':
+            return self.array()
+        self.advance()
+        if kind == 'str':
+            return _unquote(value)
+        if kind == 'num':
+            return float(value) if any(c in value for c in '.eE') else int(value)
+        if kind == 'name' and value in _KEYWORDS:
+            return _KEYWORDS[value]
+        raise self.error(f"지원하지 않는 값 '{value}'")
+
+    def obj(self, spans=None):
+        """spans(dict)를 주면 키별 값의 [시작, 끝] 오프셋도 기록."""
+        out = {}
+        for key, value, start, end in self.entries():
+            out[key] = value
+            if spans is not None:
+                spans[key] = [start, end]
+        return out
+
+    def entries(self, parse_value=None):
+        """'{' 부터 '}' 까지 (key, value, 값 시작, 값 끝) 을 하나씩 생성. 값 끝은 마지막 문자 다음 위치."""
+        parse_value = parse_value or self.value
+        self.expect('{')
+        while self.tok and self.tok[1] != '}':
+            key = self.key()
+            self.expect(':')
+            start = self.tok[2] if self.tok else len(self.text)
+            value = parse_value()
+            yield key, value, start, self.last_end
+            if self.tok and self.tok[1] == ',':
+                self.advance()
+            elif not self.tok or self.tok[1] != '}':
+                raise self.error("',' 또는 '}' 필요")
+        self.expect('}')
+
+    def array(self):
+        self.expect('[')
+        out = []
+        while self.tok and self.tok[1] != ']':
+            out.append(self.value())
+            if self.tok and self.tok[1] == ',':
+                self.advance()
+            elif not self.tok or self.tok[1] != ']':
+                raise self.error("',' 또는 ']' 필요")
+        self.expect(']')
+        return out
+
+
+def find_assignment(text, name):
+    """`name = ` 다음 값이 시작하는 위치. 주석·문자열 속 이름은 무시."""
+    prev = None
+    for kind, value, start, end in tokenize(text):
+        if prev == name and value == '=':
+            for tok in tokenize(text, end):
+                return tok[2]
+        prev = value if kind == 'name' else None
+    raise ValueError(f"{name} 선언을 찾을 수 없습니다")
+
+
+def parse_js_value(text, pos=0):
+    """pos 위치의 JS 값 리터럴 하나를 파이썬 값으로 변환."""
+    return _Parser(text, pos).value()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 3. 퀴즈 레코드
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def make_record(qid, block, span=None, words_span=None):
+    """파싱된 퀴즈 객체 -> 공용 레코드 형태."""
+    words = []
+    for w in block.get('allWords') or []:
+        if isinstance(w, dict):
+            words.append({'clue': str(w.get('clue') or ''), 'answer': str(w.get('answer') or '')})
+    return {
+        'id': qid,
+        'title': block.get('title') or '',
+        'category': block.get('category') or '',
+        'meta': block.get('meta') or '',
+        'config': block.get('config') or {},
+        'allWords': words,
+        'span': span,
+        'words_span': words_span,
+    }
+
+
+def iter_quiz_records(text, name='QUIZ_DATABASE'):
+    """QUIZ_DATABASE 리터럴을 한 번 훑으며 퀴즈 레코드를 소스 순서대로 생성 (중복 id 포함).
+    span은 퀴즈 객체 '{' ~ '}', words_span은 allWords '[' ~ ']' 의 문자 오프셋 [시작, 끝] (끝은 닫는 괄호 다음 위치)."""
+    parser = _Parser(text, find_assignment(text, name))
+    spans = {}
+
+    def quiz_value():
+        spans.clear()
+        if parser.tok and parser.tok[1] == '{':
+            return parser.obj(spans)
+        return parser.value()
+
+    for qid, block, start, end in parser.entries(quiz_value):
+        if isinstance(block, dict):
+            yield make_record(qid, block, [start, end], spans.get('allWords'))
+
+
+def quiz_fingerprint(rec):
+    """퀴즈 내용 지문 (title, category, allWords). 내용이 같으면 항상 같은 값."""
+    payload = json.dumps([rec['title'], rec['category'], rec['allWords']], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_quiz_records(path=DATA_JS):
+    """data.js -> 퀴즈 레코드 리스트 (소스 순서, 중복 id 포함)."""
+    return list(iter_quiz_records(read_text(path)))
+
+
+def records_by_id(records):
+    """중복 id는 JS 객체처럼 마지막 것만 유지."""
+    return {r['id']: r for r in records}
+
+
+def load_js_object(path, name):
+    """`const NAME = {...}` 형태 파일에서 NAME 값을 읽음 (예: data_bible_extra.js의 BIBLE_EXTRA_WORDS)."""
+    text = read_text(path)
+    return parse_js_value(text, find_assignment(text, name))
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 4. 컴파일 캐시 (.cache/quiz_db.json)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+_memo = {}  # (data_js, extra_js) -> (sources, db) : 같은 프로세스 안에서 재사용
+
+
+def file_sha256(path):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_dir_for(data_js=DATA_JS):
+    return os.path.join(os.path.dirname(os.path.abspath(data_js)), '.cache')
+
+
+def _write_json_atomic(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def load_database(data_js=DATA_JS, extra_js=EXTRA_JS, rebuild=False):
+    """{'records': [...], 'extra': {퀴즈id: [단어, ...]}} 반환.
+    data.js·data_bible_extra.js의 SHA-256이 캐시와 같으면 캐시를 그대로 읽고, 다르면 다시 파싱해 저장."""
+    key = (os.path.abspath(data_js), os.path.abspath(extra_js))
+    sources = {'data_js': file_sha256(data_js), 'extra_js': file_sha256(extra_js)}
+    memo = _memo.get(key)
+    if memo and memo[0] == sources and not rebuild:
+        return memo[1]
+
+    cache_path = os.path.join(cache_dir_for(data_js), 'quiz_db.json')
+    db = None
+    if not rebuild and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == CACHE_VERSION and cached.get('sources') == sources:
+                db = cached
+                print(f"  ⚡ quiz_db 캐시 적중 ({len(db['records'])}개 퀴즈)")
+        except (OSError, ValueError):
+            db = None
+    if db is None:
+        reason = "강제 재생성" if rebuild else "캐시 없음/원본 변경"
+        print(f"  🔄 quiz_db 캐시 미스 ({reason}) → data.js 파싱")
+        extra = load_js_object(extra_js, 'BIBLE_EXTRA_WORDS') if sources['extra_js'] else {}
+        db = {
+            'version': CACHE_VERSION,
+            'sources': sources,
+            'records': load_quiz_records(data_js),
+            'extra': extra,
+        }
+        try:
+            _write_json_atomic(cache_path, db)
+        except OSError as e:
+            print(f"  ⚠️ quiz_db 캐시 저장 실패: {e}")
+    _memo[key] = (sources, db)
+    return db
+
+
+def cached_quiz_records(data_js=DATA_JS, rebuild=False):
+    """load_quiz_records의 캐시 버전."""
+    return load_database(data_js, rebuild=rebuild)['records']
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 5. 바이트 오프셋 인덱스 + mmap 단건 조회
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+_index_memo = {}  # data_js -> index
+
+
+def build_quiz_index(data_js=DATA_JS):
+    """퀴즈 id -> [퀴즈 시작, 끝, allWords 시작, 끝] (UTF-8 바이트 오프셋). 중복 id는 마지막 정의."""
+    with open(data_js, 'rb') as f:
+        raw = f.read()
+    text = raw.decode('utf-8')
+    quizzes = {}
+    char_pos = byte_pos = 0
+
+    def to_byte(pos):
+        # 레코드가 소스 순서로 나오므로 앞에서부터 누적 변환 (전체 1회 인코딩)
+        nonlocal char_pos, byte_pos
+        byte_pos += len(text[char_pos:pos].encode('utf-8'))
+        char_pos = pos
+        return byte_pos
+
+    for rec in iter_quiz_records(text):
+        start = to_byte(rec['span'][0])
+        if rec['words_span']:
+            ws, we = to_byte(rec['words_span'][0]), to_byte(rec['words_span'][1])
+        else:
+            ws = we = None
+        quizzes[rec['id']] = [start, to_byte(rec['span'][1]), ws, we]
+    st = os.stat(data_js)
+    return {
+        'version': CACHE_VERSION,
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'quizzes': quizzes,
+    }
+
+
+def load_quiz_index(data_js=DATA_JS, rebuild=False):
+    """.cache/quiz_index.json 로드. 크기·수정시각이 같으면 그대로, 다르면 SHA-256으로 재확인 후 필요 시 재생성."""
+    data_js = os.path.abspath(data_js)
+    st = os.stat(data_js)
+    index = None if rebuild else _index_memo.get(data_js)
+    path = os.path.join(cache_dir_for(data_js), 'quiz_index.json')
+    if index is None and not rebuild and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+    if index and index.get('version') == CACHE_VERSION:
+        if (index['size'], index['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            _index_memo[data_js] = index
+            return index
+        if index['sha256'] == file_sha256(data_js):  # touch만 된 경우
+            index['mtime_ns'] = st.st_mtime_ns
+            index['size'] = st.st_size
+            _write_json_atomic(path, index)
+            _index_memo[data_js] = index
+            return index
+    index = build_quiz_index(data_js)
+    try:
+        _write_json_atomic(path, index)
+    except OSError as e:
+        print(f"  ⚠️ quiz_index 저장 실패: {e}")
+    _index_memo[data_js] = index
+    return index
+
+
+def _read_range(data_js, start, end):
+    with open(data_js, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[start:end].decode('utf-8')
+
+
+def read_quiz_words(pid, data_js=DATA_JS):
+    """퀴즈 1개의 allWords만 mmap으로 읽음 (없으면 [])."""
+    entry = load_quiz_index(data_js)['quizzes'].get(pid)
+    if not entry or entry[2] is None:
+        return []
+    words = parse_js_value(_read_range(data_js, entry[2], entry[3]))
+    return make_record(pid, {'allWords': words})['allWords']
+
+
+def main():
+    rebuild = '--rebuild-cache' in sys.argv
+    db = load_database(rebuild=rebuild)
+    load_quiz_index(rebuild=rebuild)
+    print(f"quiz_db: {len(db['records'])}개 퀴즈, 추가 단어 {len(db['extra'])}개 퀴즈")
+
+
+if __name__ == '__main__':
+    main()
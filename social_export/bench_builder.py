@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+퍼즐 배치 빌더 벤치마크 (data.js 전체 퀴즈, 고정 시드)
+- 퀴즈마다 시드 0..N-1로 build_layout 실행 → 지연시간 p50/p95/max, 목표 대비 배치율, 교차 칸 수, 시도 횟수, 최대 메모리,
+  같은 방향 단어 두 개가 한 칸이라도 함께 지나가는 빌드 수 (stacked_cells, 0이어야 함)
+- 결과는 JSON 보고서로 저장 (실행끼리 비교 가능). --baseline=이전 보고서 를 주면 처리량·배치율·교차 수가 threshold 넘게
+  떨어질 때 종료 코드 1
+- 사용: python3 bench_builder.py [--engine=greedy|search] [--seeds=3] [--budget-ms=500] [--out=보고서.json]
+                                [--baseline=이전.json] [--threshold=0.10] [--limit=N]
+"""
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from social_batch_export import (
+    DATA_JS_PATH,
+    LOG_DIR,
+    SEARCH_BUDGET_MS,
+    arg_value,
+    build_layout,
+    layout_score,
+    load_quiz_data_from_js,
+    stacked_cells,
+    target_count,
+)
+from quiz_db import cached_quiz_records, records_by_id  # social_batch_export가 상위 폴더를 sys.path에 추가함
+
+REPORT_VERSION = 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def bench_quiz(data, seeds: int, engine: str, budget_ms: int) -> Dict:
+    """퀴즈 하나를 시드별로 빌드. 지연시간은 tracemalloc 없이 재고, 메모리는 첫 시드만 따로 한 번 더 빌드해서 잼."""
+    target = target_count(len(data.words))
+    latencies = []
+    placed = []
+    crossings = []
+    attempts = []
+    stacked = 0
+    for seed in range(seeds):
+        t0 = time.perf_counter()
+        built = build_layout(data, seed, engine, budget_ms)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        words, cross, _ = layout_score(built)
+        placed.append(words)
+        crossings.append(cross)
+        attempts.append(built.attempts)
+        stacked += bool(stacked_cells(built))
+
+    tracemalloc.start()
+    build_layout(data, 0, engine, budget_ms)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "id": data.puzzle_id,
+        "pool": len(data.words),
+        "target": target,
+        "latency_ms": [round(v, 3) for v in latencies],
+        "placed": placed,
+        "crossings": crossings,
+        "attempts": attempts,
+        "stacked": stacked,
+        "hit_target": sum(p >= target for p in placed),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def summarize(quizzes: List[Dict], wall_s: float) -> Dict:
+    latencies = [v for q in quizzes for v in q["latency_ms"]]
+    builds = len(latencies)
+    placed = sum(sum(q["placed"]) for q in quizzes)
+    wanted = sum(q["target"] * len(q["placed"]) for q in quizzes)
+    return {
+        "quizzes": len(quizzes),
+        "builds": builds,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "max": round(max(latencies, default=0.0), 3),
+            "mean": round(sum(latencies) / builds, 3) if builds else 0.0,
+        },
+        "throughput_builds_per_s": round(builds / (sum(latencies) / 1000), 2) if latencies else 0.0,
+        "placement_rate": round(placed / wanted, 4) if wanted else 0.0,
+        "target_hit_rate": round(sum(q["hit_target"] for q in quizzes) / builds, 4) if builds else 0.0,
+        "crossings_per_build": round(sum(sum(q["crossings"]) for q in quizzes) / builds, 2) if builds else 0.0,
+        "attempts_per_build": round(sum(sum(q["attempts"]) for q in quizzes) / builds, 1) if builds else 0.0,
+        "stacked_builds": sum(q["stacked"] for q in quizzes),
+        "peak_kb_max": max((q["peak_kb"] for q in quizzes), default=0.0),
+        "wall_s": round(wall_s, 2),
+    }
+
+
+def compare(summary: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """기준 보고서 대비 threshold(비율) 넘게 나빠진 항목."""
+    problems = []
+    for key in ("throughput_builds_per_s", "placement_rate", "crossings_per_build"):
+        old, new = baseline.get(key) or 0, summary.get(key) or 0
+        if old and new < old * (1 - threshold):
+            problems.append(f"{key}: {old} -> {new} ({(new - old) / old:+.1%})")
+    return problems
+
+
+def main() -> int:
+    engine = arg_value("engine", "greedy")
+    seeds = int(arg_value("seeds", "3"))
+    budget_ms = int(arg_value("budget-ms", str(SEARCH_BUDGET_MS)))
+    threshold = float(arg_value("threshold", "0.10"))
+    limit = int(arg_value("limit", "0"))
+    out_path = Path(arg_value("out", str(LOG_DIR / f"bench_{engine}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")))
+    baseline_path = arg_value("baseline", "")
+
+    ids = list(records_by_id(cached_quiz_records(str(DATA_JS_PATH))))
+    if limit:
+        ids = ids[:limit]
+    quizzes = []
+    skipped = []
+    t0 = time.perf_counter()
+    for pid in ids:
+        try:
+            data = load_quiz_data_from_js(pid)
+        except (KeyError, ValueError):
+            skipped.append(pid)
+            continue
+        quizzes.append(bench_quiz(data, seeds, engine, budget_ms))
+    wall_s = time.perf_counter() - t0
+
+    summary = summarize(quizzes, wall_s)
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "params": {"engine": engine, "seeds": seeds, "budget_ms": budget_ms, "size": "auto"},
+        "python": platform.python_version(),
+        "summary": summary,
+        "skipped": skipped,
+        "quizzes": quizzes,
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+
+    lat = summary["latency_ms"]
+    print(f"{engine}: {summary['quizzes']} quizzes x {seeds} seeds, skipped {len(skipped)}")
+    print(f"  latency ms  p50={lat['p50']}  p95={lat['p95']}  max={lat['max']}  "
+          f"({summary['throughput_builds_per_s']} builds/s)")
+    print(f"  placement   {summary['placement_rate']:.1%} of target, target hit {summary['target_hit_rate']:.1%}, "
+          f"{summary['crossings_per_build']} crossings/build, {summary['attempts_per_build']} attempts/build, "
+          f"{summary['stacked_builds']} stacked builds")
+    print(f"  memory      peak {summary['peak_kb_max']} KB (tracemalloc, worst quiz)")
+    print(f"  report      {out_path}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != report["params"]:
+            print(f"  ⚠️ baseline params differ: {baseline.get('params')}")
+        problems = compare(summary, baseline.get("summary") or {}, threshold)
+        if problems:
+            print(f"REGRESSION (threshold {threshold:.0%}):")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print(f"  no regression vs {baseline_path} (threshold {threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
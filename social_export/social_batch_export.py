@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
+import hashlib
 import json
+import math
 import os
 import random
 import re
 import shutil
-import subprocess
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -17,14 +23,26 @@ WWW_DIR = SCRIPT_DIR.parent
 DATA_JS_PATH = WWW_DIR / "data.js"
 LOGO_PATH = WWW_DIR / "images" / "crossero-logo.png"
 
+sys.path.insert(0, str(WWW_DIR))
+from image_output import ImageStats, save_image  # noqa: E402
+from quiz_db import cache_dir_for, cached_quiz_records, load_database, records_by_id  # noqa: E402
+
 QUEUE_DIR = SCRIPT_DIR / "queue"
 DONE_DIR = SCRIPT_DIR / "queue_done"
 OUTPUT_DIR = SCRIPT_DIR / "output"
 LOG_DIR = SCRIPT_DIR / "logs"
+LAYOUT_CACHE_DIR = Path(cache_dir_for(str(DATA_JS_PATH))) / "layouts"
+LAYOUT_CACHE_VERSION = 5
 
 DOMAIN = "crossero.com"
 BRAND = "십자가로세로"
-SIZE = 15
+SIZE = 15  # 가장 긴 단어 길이 상한, play2.html 격자 크기 (puzzle_export는 이 크기로 고정)
+MIN_GRID = 7
+MAX_GRID = 21
+FILL_RATIO = 0.35  # 격자 중 글자가 채워지는 비율 예상치 (grid_size 계산용)
+GRID_STEPS = (0, 2, 4)  # build_puzzle이 grid_size에서 키워 보는 크기 (교차가 가장 많은 격자를 고름)
+
+DIR_BITS = {"across": 1, "down": 2}
 
 RATIOS = {
     "square": (1080, 1080),
@@ -63,6 +81,8 @@ class BuiltPuzzle:
     number_map: List[List[Optional[int]]]
     across: List[PlacedWord]
     down: List[PlacedWord]
+    seed: Optional[int] = None
+    attempts: int = 0  # 빌더가 시도한 단어 수 (search 엔진은 탐색 노드 수)
 
 
 def ensure_dirs() -> None:
@@ -87,56 +107,78 @@ def seo_image_base(title: str, puzzle_id: str) -> str:
     return base.replace("_", "-")
 
 
+# (경로, ttc 안의 글꼴 번호). 한글 글꼴 먼저, Arial·DejaVu Sans는 한글이 없는 마지막 대안 (숫자만 그리는 퍼즐 번호용).
+# NotoSansCJK ttc 1번 = KR
+FONT_CANDIDATES = {
+    True: [
+        ("/System/Library/Fonts/AppleSDGothicNeo.ttc", 0),
+        ("/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc", 1),
+        ("/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc", 1),
+        ("/usr/share/fonts/google-noto-cjk/NotoSansCJK-Bold.ttc", 1),
+        ("/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf", 0),
+        ("/usr/share/fonts/nanum/NanumGothicBold.ttf", 0),
+        ("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 0),
+        ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 0),
+    ],
+    False: [
+        ("/System/Library/Fonts/AppleSDGothicNeo.ttc", 0),
+        ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", 1),
+        ("/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc", 1),
+        ("/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc", 1),
+        ("/usr/share/fonts/truetype/nanum/NanumGothic.ttf", 0),
+        ("/usr/share/fonts/nanum/NanumGothic.ttf", 0),
+        ("/System/Library/Fonts/Supplemental/Arial.ttf", 0),
+        ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 0),
+    ],
+}
+_FONT_FILES: Dict[bool, Optional[Tuple[str, int]]] = {}
+_FONTS: Dict[Tuple[int, bool], ImageFont.FreeTypeFont] = {}
+
+
+def font_file(bold: bool = False) -> Optional[Tuple[str, int]]:
+    """FONT_CANDIDATES 중 처음 열리는 (경로, 글꼴 번호). 프로세스마다 한 번만 찾음, 없으면 None."""
+    if bold not in _FONT_FILES:
+        _FONT_FILES[bold] = None
+        for path, index in FONT_CANDIDATES[bold]:
+            if os.path.isfile(path):
+                try:
+                    ImageFont.truetype(path, size=12, index=index)
+                except OSError:
+                    continue
+                _FONT_FILES[bold] = (path, index)
+                break
+    return _FONT_FILES[bold]
+
+
 def pick_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-    if bold:
-        candidates = [
-            "/System/Library/Fonts/AppleSDGothicNeo.ttc",
-            "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-        ]
-    else:
-        candidates = [
-            "/System/Library/Fonts/AppleSDGothicNeo.ttc",
-            "/System/Library/Fonts/Supplemental/Arial.ttf",
-        ]
+    """(size, bold)마다 한 번만 불러서 재사용. 쓸 수 있는 글꼴이 없으면 Pillow 기본 글꼴."""
+    key = (size, bold)
+    font = _FONTS.get(key)
+    if font is None:
+        found = font_file(bold)
+        font = ImageFont.truetype(found[0], size=size, index=found[1]) if found else ImageFont.load_default()
+        _FONTS[key] = font
+    return font
 
-    for p in candidates:
-        if os.path.isfile(p):
-            try:
-                return ImageFont.truetype(p, size=size)
-            except Exception:
-                pass
-    return ImageFont.load_default()
 
+def has_hangul(font: ImageFont.FreeTypeFont) -> bool:
+    """'가'가 글꼴에 없는 글자(빈 네모)와 다르게 그려지면 한글 글꼴."""
+    return bytes(font.getmask("가")) != bytes(font.getmask("\U000F0000"))
 
-def load_quiz_data_from_js(puzzle_id: str) -> PuzzleData:
-    node_script = f"""
-const fs=require('fs');
-const vm=require('vm');
-let code=fs.readFileSync({json.dumps(str(DATA_JS_PATH))},'utf8');
-code += '\\nthis.__DB = QUIZ_DATABASE;';
-const ctx={{}};
-vm.createContext(ctx);
-vm.runInContext(code, ctx);
-const q = ctx.__DB[{json.dumps(puzzle_id)}];
-if (!q) {{
-  console.log(JSON.stringify({{ok:false}}));
-  process.exit(0);
-}}
-console.log(JSON.stringify({{
-  ok:true,
-  id:{json.dumps(puzzle_id)},
-  title:q.title || {json.dumps(puzzle_id)},
-  allWords:(q.allWords || []).map(w=>({{ clue:String(w.clue||''), answer:String(w.answer||'') }}))
-}}));
-"""
-
-    proc = subprocess.run(["node", "-e", node_script], capture_output=True, text=True, check=True)
-    payload = json.loads(proc.stdout.strip() or "{}")
-    if not payload.get("ok"):
-        raise KeyError(f"Puzzle id not found: {puzzle_id}")
 
+def check_fonts() -> Optional[str]:
+    """한글을 그릴 수 없는 글꼴 설정이면 오류 메시지, 괜찮으면 None (이미지를 만들기 전에 확인)."""
+    missing = [name for name, bold in (("regular", False), ("bold", True)) if not has_hangul(pick_font(24, bold))]
+    if not missing:
+        return None
+    return (f"No Hangul font for {', '.join(missing)} text (looked for AppleSDGothicNeo, Noto Sans CJK, Nanum Gothic). "
+            "Install one, e.g. `sudo apt install fonts-noto-cjk` or `fonts-nanum`.")
+
+
+def usable_words(all_words: List[Dict[str, str]]) -> List[WordEntry]:
+    """allWords 중 격자에 놓을 수 있는 단어만 (clue·answer 있음, 2~SIZE 글자)."""
     words = []
-    for w in payload.get("allWords", []):
+    for w in all_words:
         answer = (w.get("answer") or "").strip()
         clue = (w.get("clue") or "").strip()
         if not answer or not clue:
@@ -144,15 +186,31 @@ console.log(JSON.stringify({{
         if len(answer) < 2 or len(answer) > SIZE:
             continue
         words.append(WordEntry(clue=clue, answer=answer))
+    return words
+
 
+def load_quiz_data_from_js(puzzle_id: str) -> PuzzleData:
+    # data.js 공용 파서 + 캐시 (Node 불필요). 중복 id는 JS와 같이 마지막 정의 우선
+    q = records_by_id(cached_quiz_records(str(DATA_JS_PATH))).get(puzzle_id)
+    if q is None:
+        raise KeyError(f"Puzzle id not found: {puzzle_id}")
+
+    words = usable_words(q["allWords"])
     if not words:
         raise ValueError(f"No usable words in puzzle: {puzzle_id}")
 
-    return PuzzleData(puzzle_id=puzzle_id, title=payload["title"], words=words)
+    return PuzzleData(puzzle_id=puzzle_id, title=q["title"] or puzzle_id, words=words)
 
 
-def make_empty_grid() -> List[List[Optional[str]]]:
-    return [[None for _ in range(SIZE)] for _ in range(SIZE)]
+def grid_size(words: List[WordEntry], target: int) -> int:
+    """단어 풀에 맞춘 정사각 격자 한 변: 목표 개수만큼의 평균 길이 단어가 FILL_RATIO로 들어갈 넓이 (가장 긴 단어는 들어가게).
+    5단어 풀은 7x7, 35단어 목표는 17x17 안팎."""
+    if not words:
+        return MIN_GRID
+    lengths = [len(w.answer) for w in words]
+    letters = sum(lengths) / len(lengths) * min(target, len(words))
+    side = math.ceil(math.sqrt(letters / FILL_RATIO))
+    return min(MAX_GRID, max(MIN_GRID, side, max(lengths)))
 
 
 def target_count(pool_size: int) -> int:
@@ -167,70 +225,257 @@ def target_count(pool_size: int) -> int:
     return max(5, pool_size - 2)
 
 
-def build_puzzle(data: PuzzleData) -> BuiltPuzzle:
-    random.seed()
-    pool = [WordEntry(w.clue, w.answer) for w in data.words]
-    random.shuffle(pool)
+class Board:
+    """size x size 격자. 칸은 평평한 array (글자 코드, 0 = 빈칸), 행/열마다 점유 비트마스크.
+    row_mask[y]의 x번째 비트 = (x, y) 칸 사용 중, col_mask[x]의 y번째 비트도 같은 칸.
+    cells_by_code: 글자 코드 -> 그 글자가 있는 칸 번호 목록, cell_dirs: 칸마다 이미 쓰인 방향 (1 = across, 2 = down)."""
 
-    solution = make_empty_grid()
-    number_map: List[List[Optional[int]]] = [[None for _ in range(SIZE)] for _ in range(SIZE)]
+    def __init__(self, size: int = SIZE) -> None:
+        self.size = size
+        self.cells = array("I", bytes(4 * size * size))
+        self.row_mask = [0] * size
+        self.col_mask = [0] * size
+        self.cell_dirs = bytearray(size * size)
+        self.cells_by_code: Dict[int, List[int]] = {}
 
-    across: List[PlacedWord] = []
-    down: List[PlacedWord] = []
-    placed: List[PlacedWord] = []
-    used = set()
-    next_num = 1
-
-    t_count = target_count(len(pool))
-
-    def in_bounds(x: int, y: int) -> bool:
-        return 0 <= x < SIZE and 0 <= y < SIZE
-
-    def can_place(word: str, x: int, y: int, direction: str) -> Tuple[bool, int]:
+    def can_place(self, codes: Sequence[int], x: int, y: int, direction: str) -> Tuple[bool, int]:
+        """(놓을 수 있는지, 교차 칸 수). 앞뒤 칸이 비어 있고, 새로 채우는 칸의 양옆(가로면 위아래)이 비어 있어야 함."""
+        n = self.size
+        length = len(codes)
         if direction == "across":
-            if x < 0 or x + len(word) > SIZE or y < 0 or y >= SIZE:
-                return False, 0
+            lines, pos, line, step = self.row_mask, x, y, 1
         else:
-            if y < 0 or y + len(word) > SIZE or x < 0 or x >= SIZE:
-                return False, 0
-
-        before = (x - 1, y) if direction == "across" else (x, y - 1)
-        after = (x + len(word), y) if direction == "across" else (x, y + len(word))
-        if in_bounds(*before) and solution[before[1]][before[0]] is not None:
+            lines, pos, line, step = self.col_mask, y, x, n
+        if pos < 0 or pos + length > n or line < 0 or line >= n:
             return False, 0
-        if in_bounds(*after) and solution[after[1]][after[0]] is not None:
+
+        occ_line = lines[line]
+        if (pos and occ_line >> (pos - 1) & 1) or occ_line >> (pos + length) & 1:
             return False, 0
 
+        span = (1 << length) - 1
+        occ = occ_line >> pos & span
+        free = span & ~occ
+        if free:
+            # 새로 채우는 칸은 평행한 이웃 줄의 같은 위치가 비어 있어야 함
+            if line > 0 and lines[line - 1] >> pos & free:
+                return False, 0
+            if line + 1 < n and lines[line + 1] >> pos & free:
+                return False, 0
+
         cross_count = 0
+        if occ:
+            cells = self.cells
+            base = y * n + x
+            while occ:
+                low = occ & -occ
+                i = low.bit_length() - 1
+                if cells[base + i * step] != codes[i]:
+                    return False, 0
+                cross_count += 1
+                occ ^= low
+        return True, cross_count
 
-        for i, ch in enumerate(word):
+    def place(self, codes: Sequence[int], x: int, y: int, direction: str) -> None:
+        n = self.size
+        cells = self.cells
+        bit = DIR_BITS[direction]
+        for i, code in enumerate(codes):
             cx = x + i if direction == "across" else x
             cy = y if direction == "across" else y + i
-            existing = solution[cy][cx]
-
-            if existing is not None and existing != ch:
-                return False, 0
-            if existing == ch:
-                cross_count += 1
+            idx = cy * n + cx
+            if not cells[idx]:
+                cells[idx] = code
+                self.cells_by_code.setdefault(code, []).append(idx)
+                self.row_mask[cy] |= 1 << cx
+                self.col_mask[cx] |= 1 << cy
+            self.cell_dirs[idx] |= bit
+
+    def remove(self, codes: Sequence[int], x: int, y: int, direction: str, shared: Sequence[bool]) -> None:
+        """place 되돌리기 (백트래킹용). shared[i] = 놓기 전에 이미 차 있던 칸 (교차 칸은 글자를 남김)."""
+        n = self.size
+        bit = DIR_BITS[direction]
+        for i, code in enumerate(codes):
+            cx = x + i if direction == "across" else x
+            cy = y if direction == "across" else y + i
+            idx = cy * n + cx
+            self.cell_dirs[idx] &= ~bit
+            if not shared[i]:
+                self.cells[idx] = 0
+                self.cells_by_code[code].remove(idx)
+                self.row_mask[cy] &= ~(1 << cx)
+                self.col_mask[cx] &= ~(1 << cy)
+
+    def overlaps_direction(self, length: int, x: int, y: int, direction: str) -> bool:
+        """자리 중 이미 같은 방향 단어가 지나가는 칸이 있는지 (같은 단어를 겹쳐 놓는 경우 방지)."""
+        n = self.size
+        bit = DIR_BITS[direction]
+        step = 1 if direction == "across" else n
+        base = y * n + x
+        return any(self.cell_dirs[base + i * step] & bit for i in range(length))
+
+    def crossing_slots(self, codes: Sequence[int]) -> List[Tuple[int, int, str]]:
+        """codes 단어가 기존 글자와 교차하는 (x, y, 방향) 후보. 글자 색인만 조회 (놓인 단어 수와 무관).
+        이미 가로·세로 모두 쓰인 칸은 더 교차할 수 없으므로 제외. 같은 자리는 한 번만."""
+        n = self.size
+        seen = set()
+        slots = []
+        for wi, code in enumerate(codes):
+            for idx in self.cells_by_code.get(code, ()):
+                used = self.cell_dirs[idx]
+                if used == 3:
+                    continue
+                cy, cx = divmod(idx, n)
+                if used == 1:
+                    slot = (cx, cy - wi, "down")
+                else:
+                    slot = (cx - wi, cy, "across")
+                if slot not in seen:
+                    seen.add(slot)
+                    slots.append(slot)
+        return slots
+
+    def free_slots(self, codes: Sequence[int]) -> List[Tuple[int, int, str]]:
+        """놓을 수 있는 모든 (x, y, 방향)을 한 번에 나열 (무작위 탐색 대신).
+        줄마다 '비어 있지만 채울 수 없는 칸'(이웃 줄이 차 있음)을 막힌 칸으로 보고, 막히지 않은 구간(free run) 안에서만 시작 위치를 검사.
+        같은 방향 단어 위에 겹치는 자리(똑같은 단어를 그대로 포개는 경우 포함)는 제외."""
+        n = self.size
+        length = len(codes)
+        span = (1 << length) - 1
+        slots = []
+        for direction, lines in (("across", self.row_mask), ("down", self.col_mask)):
+            for line in range(n):
+                occ = lines[line]
+                near = (lines[line - 1] if line > 0 else 0) | (lines[line + 1] if line + 1 < n else 0)
+                blocked = near & ~occ
+                pos = 0
+                while pos + length <= n:
+                    if blocked >> pos & 1:
+                        pos += 1
+                        continue
+                    run_end = pos
+                    while run_end < n and not blocked >> run_end & 1:
+                        run_end += 1
+                    for start in range(pos, run_end - length + 1):
+                        x, y = (start, line) if direction == "across" else (line, start)
+                        if not self.can_place(codes, x, y, direction)[0]:
+                            continue
+                        if occ >> start & span and self.overlaps_direction(length, x, y, direction):
+                            continue
+                        slots.append((x, y, direction))
+                    pos = run_end
+        return slots
+
+    def crowding(self, length: int, x: int, y: int, direction: str, reach: int = 3) -> int:
+        """자리 주변 평행한 줄(양쪽 reach줄, 앞뒤 한 칸 포함)에 이미 찬 칸 수. 0이면 나중 단어가 이 단어를 가로지를 여유가 있음."""
+        n = self.size
+        if direction == "across":
+            lines, pos, line = self.row_mask, x, y
+        else:
+            lines, pos, line = self.col_mask, y, x
+        span = ((1 << (length + 2)) - 1) << pos >> 1
+        count = 0
+        for j in range(max(0, line - reach), min(n, line + reach + 1)):
+            if j != line:
+                count += (lines[j] & span).bit_count()
+        return count
+
+    def bbox(self) -> Optional[Tuple[int, int, int, int]]:
+        """사용 중인 칸의 (x0, y0, x1, y1), 비어 있으면 None."""
+        rows = [y for y, m in enumerate(self.row_mask) if m]
+        if not rows:
+            return None
+        cols = [x for x, m in enumerate(self.col_mask) if m]
+        return cols[0], rows[0], cols[-1], rows[-1]
+
+    def filled(self) -> int:
+        """사용 중인 칸 수."""
+        return sum(bin(m).count("1") for m in self.row_mask)
+
+    def to_solution(self) -> List[List[Optional[str]]]:
+        n = self.size
+        return [[chr(c) if c else None for c in self.cells[y * n:(y + 1) * n]] for y in range(n)]
+
+
+def compactness(bbox: Optional[Tuple[int, int, int, int]], x: int, y: int, length: int, direction: str,
+                size: int = SIZE) -> Tuple[int, int]:
+    """작을수록 좋은 점수: (놓은 뒤 외곽 사각형 넓이, 격자 중심과의 거리)."""
+    x1 = x + length - 1 if direction == "across" else x
+    y1 = y if direction == "across" else y + length - 1
+    if bbox is None:
+        area = (x1 - x + 1) * (y1 - y + 1)
+    else:
+        area = (max(bbox[2], x1) - min(bbox[0], x) + 1) * (max(bbox[3], y1) - min(bbox[1], y) + 1)
+    center = size - 1
+    return area, abs(x + x1 - center) + abs(y + y1 - center)
+
+
+def best_free_slot(board: Board, slots: Sequence[Tuple[int, int, str]], length: int,
+                   size: int = SIZE) -> Tuple[int, int, str]:
+    """교차 없이 놓을 자리 고르기: board.crowding이 가장 작은 자리 중 compactness가 가장 작은 곳.
+    외곽 사각형만 줄이면 평행한 줄이 빽빽하게 쌓여 나중 단어가 가로지를 자리가 사라지므로 주변이 빈 자리를 먼저."""
+    crowd = [board.crowding(length, *sl) for sl in slots]
+    least = min(crowd)
+    bbox = board.bbox()
+    return min((sl for sl, c in zip(slots, crowd) if c == least),
+               key=lambda sl: compactness(bbox, sl[0], sl[1], length, sl[2], size))
+
+
+def build_puzzle(data: PuzzleData, seed: Optional[int] = None, target: Optional[int] = None,
+                 size: Optional[int] = None, deadline: Optional[float] = None) -> BuiltPuzzle:
+    """target: 목표 단어 수 (기본 target_count(단어 수)), size: 격자 한 변.
+    size가 없으면 grid_size + GRID_STEPS 크기마다 같은 시드로 만들어 layout_score가 가장 높은 격자 (같으면 작은 격자).
+    grid_size 딱 맞는 격자는 단어는 다 들어가도 가로지를 여유가 없어 교차가 적음. attempts는 모든 크기의 합.
+    deadline(time.time() 기준)이 지나면 남은 크기는 건너뜀 (첫 크기는 항상 만듦)."""
+    t_count = target if target is not None else target_count(len(data.words))
+    if size:
+        return build_puzzle_levels(data, [(t_count, size * size)], seed, size)[0]
+    if seed is None:
+        seed = random.randrange(1 << 31)
+    base = grid_size(data.words, t_count)
+    sizes = sorted({min(MAX_GRID, base + step) for step in GRID_STEPS})
+    builds = []
+    for n in sizes:
+        if builds and deadline is not None and time.time() >= deadline:
+            break
+        builds.append(build_puzzle_levels(data, [(t_count, n * n)], seed, n)[0])
+    best = max(builds, key=layout_score)
+    best.attempts = sum(b.attempts for b in builds)
+    return best
+
+
+def build_puzzle_levels(data: PuzzleData, stops: Sequence[Tuple[int, int]], seed: Optional[int] = None,
+                        size: int = SIZE) -> List[BuiltPuzzle]:
+    """한 번의 greedy 배치에서 단계별 퍼즐을 뽑음. stops: 단계마다 (목표 단어 수, 목표 채운 칸 수), 둘 중 먼저 닿을 때의
+    격자를 그 단계 결과로 복사하고 같은 격자에 이어서 놓음 → 어려운 단계는 쉬운 단계를 포함. 결과는 stops 순서.
+    풀이 먼저 떨어지면 남은 단계는 마지막 격자."""
+    if seed is None:
+        seed = random.randrange(1 << 31)
+    rng = random.Random(seed)
+    pool = [WordEntry(w.clue, w.answer) for w in data.words]
+    rng.shuffle(pool)
+    order = sorted(range(len(stops)), key=lambda i: stops[i])
+    results: List[Optional[BuiltPuzzle]] = [None] * len(stops)
+    stop_at = 0
 
-            if existing is None:
-                neighbors = [(cx - 1, cy), (cx + 1, cy)] if direction == "down" else [(cx, cy - 1), (cx, cy + 1)]
-                for nx, ny in neighbors:
-                    if in_bounds(nx, ny) and solution[ny][nx] is not None:
-                        return False, 0
+    board = Board(size)
+    number_map: List[List[Optional[int]]] = [[None for _ in range(size)] for _ in range(size)]
 
-        return True, cross_count
+    across: List[PlacedWord] = []
+    down: List[PlacedWord] = []
+    placed: List[PlacedWord] = []
+    used = set()  # 놓인 정답 (같은 정답이 힌트만 달리해 풀에 여러 번 있어도 한 번만 놓음)
+    next_num = 1
 
-    def place_word(word: WordEntry, x: int, y: int, direction: str) -> bool:
+    def place_word(word: WordEntry, x: int, y: int, direction: str, codes: Optional[List[int]] = None) -> bool:
         nonlocal next_num
-        ok, _ = can_place(word.answer, x, y, direction)
+        if codes is None:
+            codes = [ord(ch) for ch in word.answer]
+        ok, _ = board.can_place(codes, x, y, direction)
         if not ok:
             return False
 
-        for i, ch in enumerate(word.answer):
-            cx = x + i if direction == "across" else x
-            cy = y if direction == "across" else y + i
-            solution[cy][cx] = ch
+        board.place(codes, x, y, direction)
 
         if number_map[y][x] is None:
             number_map[y][x] = next_num
@@ -251,109 +496,381 @@ def build_puzzle(data: PuzzleData) -> BuiltPuzzle:
             down.append(pw)
 
         placed.append(pw)
-        used.add((word.answer, word.clue))
+        used.add(word.answer)
         return True
 
-    first = pool.pop(0)
-    fx = max(0, (SIZE - len(first.answer)) // 2)
-    fy = SIZE // 2
-    place_word(first, fx, fy, "across")
-
-    retry: List[WordEntry] = []
     attempts = 0
-    max_attempts = 12000
 
-    while attempts < max_attempts and len(placed) < t_count and (pool or retry):
-        if not pool and retry:
-            random.shuffle(retry)
-            pool = retry
-            retry = []
+    def take_snapshots() -> None:
+        nonlocal stop_at
+        while stop_at < len(order):
+            words, cells = stops[order[stop_at]]
+            if len(placed) < words and board.filled() < cells and pool:
+                return
+            results[order[stop_at]] = BuiltPuzzle(
+                title=data.title,
+                solution=board.to_solution(),
+                number_map=[row[:] for row in number_map],
+                across=sorted(across, key=lambda q: q.num),
+                down=sorted(down, key=lambda q: q.num),
+                seed=seed,
+                attempts=attempts,
+            )
+            stop_at += 1
 
-        if not pool:
-            break
+    first = pool.pop(0)
+    fx = max(0, (size - len(first.answer)) // 2)
+    fy = size // 2
+    place_word(first, fx, fy, "across")
+    take_snapshots()
 
+    # 빈 자리를 전부 검사하므로 한 번 못 놓은 단어는 다시 시도하지 않음 → 단어마다 최대 한 번, 총 작업량이 풀 크기에 비례
+    while stop_at < len(order) and pool:
         w = pool.pop(0)
-        if (w.answer, w.clue) in used:
-            attempts += 1
+        if w.answer in used:
             continue
+        attempts += 1
 
         candidates: List[Tuple[int, int, int, str]] = []
+        w_codes = [ord(ch) for ch in w.answer]
 
-        for p in reversed(placed):
-            new_dir = "down" if p.dir == "across" else "across"
-            for wi, wc in enumerate(w.answer):
-                for pi, pc in enumerate(p.answer):
-                    if wc != pc:
-                        continue
-                    if new_dir == "across":
-                        x = p.x - wi
-                        y = p.y + pi
-                    else:
-                        x = p.x + pi
-                        y = p.y - wi
-                    ok, cross = can_place(w.answer, x, y, new_dir)
-                    if ok:
-                        candidates.append((cross, x, y, new_dir))
+        for x, y, new_dir in board.crossing_slots(w_codes):
+            ok, cross = board.can_place(w_codes, x, y, new_dir)
+            if ok and not board.overlaps_direction(len(w_codes), x, y, new_dir):
+                candidates.append((cross, x, y, new_dir))
 
         placed_now = False
         if candidates:
             candidates.sort(key=lambda x: x[0], reverse=True)
             top = candidates[: min(3, len(candidates))]
-            _, x, y, d = random.choice(top)
-            placed_now = place_word(w, x, y, d)
-
-        if not placed_now:
-            dirs = ["across", "down"]
-            random.shuffle(dirs)
-            for d in dirs:
-                for _ in range(200):
-                    x = random.randint(0, SIZE - 1)
-                    y = random.randint(0, SIZE - 1)
-                    if place_word(w, x, y, d):
-                        placed_now = True
-                        break
-                if placed_now:
-                    break
+            _, x, y, d = rng.choice(top)
+            placed_now = place_word(w, x, y, d, w_codes)
 
         if not placed_now:
-            retry.append(w)
-
-        attempts += 1
+            # 교차 자리가 없으면 빈 자리 중 주변 평행 줄이 가장 빈 곳 (같은 방향 단어 위에 겹쳐 놓지 않음, 없으면 확실히 실패)
+            slots = board.free_slots(w_codes)
+            if slots:
+                x, y, d = best_free_slot(board, slots, len(w_codes), size)
+                place_word(w, x, y, d, w_codes)
+        take_snapshots()
+    take_snapshots()
+
+    return results
+
+
+FREE_SLOT_BRANCH = 2
+SEARCH_BUDGET_MS = 500
+
+
+def build_puzzle_search(data: PuzzleData, seed: Optional[int] = None, budget_ms: int = SEARCH_BUDGET_MS,
+                        target: Optional[int] = None, size: Optional[int] = None) -> BuiltPuzzle:
+    """백트래킹 배치 엔진 (build_puzzle과 같은 BuiltPuzzle 반환).
+    - 단어마다 도메인 = 지금 놓을 수 있는 교차 자리. 도메인이 가장 작은 단어부터 고름 (most-constrained-first)
+    - 놓을 때마다 남은 단어의 도메인을 교차 칸 기준으로 다시 계산 (forward checking). 교차 자리가 없는 단어만 남으면
+      build_puzzle처럼 빈 자리에 놓고, 빈 자리도 없는 단어는 버림
+    - 놓인 수 + 남은 단어 수가 지금까지의 최선 이하면 되돌아감. 단어를 '쓰지 않는' 선택도 탐색
+    - 목표 개수에 닿거나 budget_ms가 지나면 그때까지 가장 많이 놓은 배치 반환"""
+    if seed is None:
+        seed = random.randrange(1 << 31)
+    rng = random.Random(seed)
+    seen = set()
+    words: List[WordEntry] = []
+    for w in data.words:  # 정답마다 첫 힌트 하나만 (build_puzzle과 같이 같은 정답은 한 번만 놓음)
+        if w.answer not in seen:
+            seen.add(w.answer)
+            words.append(WordEntry(w.clue, w.answer))
+    rng.shuffle(words)
+    t_count = target if target is not None else target_count(len(data.words))
+    size = size or grid_size(words, t_count)
+    codes = [[ord(ch) for ch in w.answer] for w in words]
+    syllables = [set(c) for c in codes]
+    links = [{j for j in range(len(words)) if j != i and syllables[i] & syllables[j]} for i in range(len(words))]
+
+    board = Board(size)
+    deadline = time.monotonic() + budget_ms / 1000
+    placements: List[Tuple[int, int, int, str]] = []  # (단어 번호, x, y, 방향), 놓은 순서
+    best: List[Tuple[int, int, int, str]] = []
+    nodes = 0
+
+    def domain(i: int) -> List[Tuple[int, int, int, str]]:
+        out = []
+        for x, y, d in board.crossing_slots(codes[i]):
+            ok, cross = board.can_place(codes[i], x, y, d)
+            if ok and not board.overlaps_direction(len(codes[i]), x, y, d):
+                out.append((cross, x, y, d))
+        return out
+
+    def search(open_words: List[int]) -> bool:
+        nonlocal best, nodes
+        nodes += 1
+        if len(placements) > len(best):
+            best = placements[:]
+        if len(placements) >= t_count:
+            return True
+        if time.monotonic() >= deadline:
+            return False
 
+        domains = {i: domain(i) for i in open_words}
+        alive = list(open_words)
+        if len(placements) + len(alive) <= len(best):
+            return False  # 이 가지에서는 지금까지의 최선보다 많이 놓을 수 없음
+        bbox = board.bbox()
+        choices = [i for i in alive if domains[i]]
+        if choices:
+            i = min(choices, key=lambda k: (len(domains[k]), k))
+            values = sorted(domains[i], key=lambda v: (-v[0], compactness(bbox, v[1], v[2], len(codes[i]), v[3], size)))
+        else:
+            # 교차할 곳이 없으면 build_puzzle처럼 주변이 빈 자리 먼저 (상위 FREE_SLOT_BRANCH개만, 같은 방향 단어와 겹치는 자리는
+            # free_slots가 이미 제외), 빈 자리도 없는 단어는 제외
+            values = []
+            while alive and not values:
+                i = alive[0]
+                slots = board.free_slots(codes[i])
+                if not slots:
+                    alive.pop(0)
+                    continue
+                slots.sort(key=lambda sl: (board.crowding(len(codes[i]), *sl),)
+                           + compactness(bbox, sl[0], sl[1], len(codes[i]), sl[2], size))
+                values = [(0, x, y, d) for x, y, d in slots[:FREE_SLOT_BRANCH]]
+            if not values or len(placements) + len(alive) <= len(best):
+                return False
+        rest = [k for k in alive if k != i]
+
+        for _, x, y, d in values:
+            shared = [bool(board.cells[(y + k if d == "down" else y) * board.size + (x + k if d == "across" else x)])
+                      for k in range(len(codes[i]))]
+            board.place(codes[i], x, y, d)
+            placements.append((i, x, y, d))
+            if search(rest):
+                return True
+            placements.pop()
+            board.remove(codes[i], x, y, d, shared)
+            if time.monotonic() >= deadline:
+                return False
+        # 이 단어를 쓰지 않는 경우
+        return search(rest)
+
+    if words:
+        # 첫 단어: 다른 단어와 글자를 가장 많이 공유하는 단어를 가운데 가로로
+        first = max(range(len(words)), key=lambda k: (len(links[k]), -k))
+        fx = max(0, (size - len(codes[first])) // 2)
+        board.place(codes[first], fx, size // 2, "across")
+        placements.append((first, fx, size // 2, "across"))
+        search([k for k in range(len(words)) if k != first])
+
+    # 놓은 순서대로 번호 매기기 (build_puzzle과 같은 규칙)
+    final = Board(size)
+    number_map: List[List[Optional[int]]] = [[None for _ in range(size)] for _ in range(size)]
+    across: List[PlacedWord] = []
+    down: List[PlacedWord] = []
+    next_num = 1
+    for i, x, y, d in best:
+        final.place(codes[i], x, y, d)
+        if number_map[y][x] is None:
+            number_map[y][x] = next_num
+            next_num += 1
+        pw = PlacedWord(num=number_map[y][x], x=x, y=y, dir=d, clue=words[i].clue, answer=words[i].answer)
+        (across if d == "across" else down).append(pw)
     across.sort(key=lambda q: q.num)
     down.sort(key=lambda q: q.num)
+    return BuiltPuzzle(title=data.title, solution=final.to_solution(), number_map=number_map, across=across, down=down,
+                       seed=seed, attempts=nodes)
+
+
+ENGINES = ("greedy", "search")
+
+
+def build_layout(data: PuzzleData, seed: Optional[int] = None, engine: str = "greedy",
+                 budget_ms: int = SEARCH_BUDGET_MS, target: Optional[int] = None, size: Optional[int] = None,
+                 deadline: Optional[float] = None) -> BuiltPuzzle:
+    """engine: "greedy" = build_puzzle, "search" = build_puzzle_search (budget_ms 제한). size 없으면 단어 풀에 맞춘 격자.
+    deadline(time.time() 기준, 프로세스끼리 같은 시계): search는 남은 시간까지만 탐색, greedy는 격자 크기 사이에서 멈춤."""
+    if engine == "search":
+        if deadline is not None:
+            budget_ms = max(0, min(budget_ms, int((deadline - time.time()) * 1000)))
+        return build_puzzle_search(data, seed, budget_ms, target, size)
+    if engine != "greedy":
+        raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+    return build_puzzle(data, seed, target, size, deadline)
+
+
+def build_restart(data: PuzzleData, seed: int, engine: str, budget_ms: int, deadline: float,
+                  optional: bool = True) -> Optional[BuiltPuzzle]:
+    """build_best_puzzle의 시드 하나 (풀 작업). optional이면 시작할 때 이미 deadline이 지났을 때 만들지 않고 None."""
+    if optional and time.time() >= deadline:
+        return None
+    return build_layout(data, seed, engine, budget_ms, deadline=deadline)
+
+
+def build_levels(data: PuzzleData, config: Dict[str, dict], seed: Optional[int] = None,
+                 size: int = SIZE) -> Dict[str, BuiltPuzzle]:
+    """퀴즈 config의 단계별("1"~"3") 퍼즐을 build_puzzle_levels 한 번으로. 단계마다 qCount 단어 또는
+    density(채운 칸 / 전체 칸, play.html 칸 채움율)에 먼저 닿는 격자."""
+    keys = sorted(config)
+    stops = [(min(int(config[k]["qCount"]), len(data.words)), math.ceil(float(config[k]["density"]) * size * size))
+             for k in keys]
+    return dict(zip(keys, build_puzzle_levels(data, stops, seed, size)))
+
+
+def crop_to_content(built: BuiltPuzzle) -> BuiltPuzzle:
+    """글자가 있는 외곽 사각형만 남긴 BuiltPuzzle (좌표를 옮김, 정사각형이 아닐 수 있음). 빈 퍼즐은 그대로."""
+    rows = [y for y, row in enumerate(built.solution) if any(c is not None for c in row)]
+    if not rows:
+        return built
+    cols = [x for x in range(len(built.solution[0])) if any(row[x] is not None for row in built.solution)]
+    x0, x1, y0, y1 = cols[0], cols[-1], rows[0], rows[-1]
+
+    def shift(words: List[PlacedWord]) -> List[PlacedWord]:
+        return [PlacedWord(q.num, q.x - x0, q.y - y0, q.dir, q.clue, q.answer) for q in words]
+
+    return BuiltPuzzle(
+        title=built.title,
+        solution=[row[x0:x1 + 1] for row in built.solution[y0:y1 + 1]],
+        number_map=[row[x0:x1 + 1] for row in built.number_map[y0:y1 + 1]],
+        across=shift(built.across),
+        down=shift(built.down),
+        seed=built.seed,
+        attempts=built.attempts,
+    )
 
-    return BuiltPuzzle(title=data.title, solution=solution, number_map=number_map, across=across, down=down)
 
+def stacked_cells(built: BuiltPuzzle) -> List[Tuple[int, int, str]]:
+    """같은 방향 단어 두 개가 함께 지나가는 (x, y, 방향) 칸 (정상 배치면 빈 리스트). 완전히 포갠 경우와 일부만 겹친 경우 모두."""
+    seen = set()
+    stacked = []
+    for q in built.across + built.down:
+        for i in range(len(q.answer)):
+            cell = (q.x + i, q.y, q.dir) if q.dir == "across" else (q.x, q.y + i, q.dir)
+            if cell in seen:
+                stacked.append(cell)
+            seen.add(cell)
+    return stacked
+
+
+def layout_score(built: BuiltPuzzle) -> Tuple[int, int, float]:
+    """클수록 좋은 점수: (놓인 단어 수, 교차 칸 수, 외곽 사각형 안에서 채워진 칸 비율)."""
+    across_cells = {(q.x + i, q.y) for q in built.across for i in range(len(q.answer))}
+    down_cells = {(q.x, q.y + i) for q in built.down for i in range(len(q.answer))}
+    filled = across_cells | down_cells
+    if not filled:
+        return 0, 0, 0.0
+    xs = [c[0] for c in filled]
+    ys = [c[1] for c in filled]
+    area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+    return len(built.across) + len(built.down), len(across_cells & down_cells), len(filled) / area
+
+
+def build_best_puzzle(data: PuzzleData, restarts: int = 8, budget_s: float = 3.0, base_seed: Optional[int] = None,
+                      pool: Optional[ProcessPoolExecutor] = None, engine: str = "greedy",
+                      budget_ms: int = SEARCH_BUDGET_MS) -> BuiltPuzzle:
+    """시드를 바꿔 build_layout을 restarts번 실행하고 layout_score가 가장 높은 결과 반환 (BuiltPuzzle.seed = 우승 시드).
+    pool이 있으면 시드별로 병렬 실행. budget_s(초)가 지나면 끝난 결과 중에서 고름.
+    작업마다 같은 마감 시각을 받음: search는 마감까지만 탐색, greedy는 격자 크기 사이에서 멈추고, 마감 뒤에 시작한
+    작업은 바로 끝남 (첫 시드만은 항상 만들어 결과 최소 1개). 마감 뒤에도 도는 작업은 greedy 격자 하나 분량뿐이라
+    budget_s는 그만큼 넘을 수 있는 느슨한 제한."""
+    if base_seed is None:
+        base_seed = random.randrange(1 << 31)
+    seeds = [base_seed + i for i in range(max(1, restarts))]
+    deadline = time.time() + budget_s
+    results: List[BuiltPuzzle] = []
+
+    if pool is None:
+        for i, seed in enumerate(seeds):
+            built = build_restart(data, seed, engine, budget_ms, deadline, optional=i > 0)
+            if built is None:
+                break
+            results.append(built)
+    else:
+        futures = [pool.submit(build_restart, data, seed, engine, budget_ms, deadline, i > 0)
+                   for i, seed in enumerate(seeds)]
+        try:
+            for fut in as_completed(futures, timeout=budget_s):
+                if fut.result() is not None:
+                    results.append(fut.result())
+        except FuturesTimeout:
+            if not results:
+                results.append(futures[0].result())
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+    # 점수가 같으면 작은 시드 (실행 순서와 무관하게 같은 결과)
+    return max(results, key=lambda b: (layout_score(b), -b.seed))
+
+
+_TILES: Dict[Tuple[str, str, int], Tuple[Image.Image, int, int]] = {}
+
+
+def cell_tile(kind: str, text: str, cell: int) -> Tuple[Image.Image, int, int]:
+    """render_board 칸 조각을 한 번만 그려 재사용 (프로세스 전체 공유, 배치의 모든 보드가 같이 씀). (조각, 칸 안 x, y) 반환.
+    kind "active"/"blocked": 테두리 포함 (cell + 1)px 정사각 RGBA 칸, "num"/"char": 글자 모양만 잘라 낸 L 마스크."""
+    key = (kind, text, cell)
+    tile = _TILES.get(key)
+    if tile is None:
+        if kind in ("active", "blocked"):
+            img = Image.new("RGBA", (cell + 1, cell + 1), (0, 0, 0, 0))
+            ImageDraw.Draw(img).rectangle([0, 0, cell, cell], fill=(255, 255, 255) if kind == "active" else (90, 90, 90),
+                                          outline=(175, 175, 175))
+            tile = (img, 0, 0)
+        else:
+            mask = Image.new("L", (cell, cell), 0)
+            draw = ImageDraw.Draw(mask)
+            if kind == "num":
+                draw.text((3, 2), text, font=pick_font(max(11, int(cell * 0.2)), bold=True), fill=255)
+            else:
+                font = pick_font(max(18, int(cell * 0.48)), bold=True)
+                bbox = draw.textbbox((0, 0), text, font=font)
+                tw = bbox[2] - bbox[0]
+                th = bbox[3] - bbox[1]
+                draw.text(((cell - tw) // 2, (cell - th) // 2 - 2), text, font=font, fill=255)
+            ink = mask.getbbox() or (0, 0, 1, 1)
+            tile = (mask.crop(ink), ink[0], ink[1])
+        _TILES[key] = tile
+    return tile
 
-def render_board(solution: List[List[Optional[str]]], number_map: List[List[Optional[int]]], show_answer: bool, size_px: int = 900) -> Image.Image:
-    cell = size_px // SIZE
-    img = Image.new("RGBA", (size_px, size_px), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
 
-    num_font = pick_font(max(11, int(cell * 0.2)), bold=True)
-    char_font = pick_font(max(18, int(cell * 0.48)), bold=True)
+def card_board_box(size: Tuple[int, int]) -> Tuple[int, int]:
+    """render_board_card에서 보드가 들어갈 (너비, 높이)."""
+    w, h = size
+    header_h = max(180, int(h * 0.16))
+    return w - 120, h - header_h - 140
+
+
+def board_cell(solution: List[List[Optional[str]]], box: Tuple[int, int]) -> int:
+    """box 안에 격자 전체가 들어가는 가장 큰 칸 크기 (px)."""
+    return min(box[0] // len(solution[0]), box[1] // len(solution))
+
 
-    for y in range(SIZE):
-        for x in range(SIZE):
+def render_board(solution: List[List[Optional[str]]], number_map: List[List[Optional[int]]], show_answer: bool, size_px: int = 900,
+                 cell: Optional[int] = None) -> Image.Image:
+    """격자 그림 (긴 변 = size_px, cell을 주면 칸 크기 그대로). 격자 크기·모양은 solution을 따름 (crop_to_content 결과면 쓰인 영역만).
+    칸·번호·글자는 cell_tile 조각을 붙여 넣기만 함 (글자마다 다시 그리지 않음)."""
+    rows, cols = len(solution), len(solution[0])
+    cell = cell or size_px // max(rows, cols)
+    img = Image.new("RGBA", (cols * cell, rows * cell), (255, 255, 255, 255))
+    active_tile = cell_tile("active", "", cell)[0]
+    blocked_tile = cell_tile("blocked", "", cell)[0]
+    box_w = int(cell * 0.30)
+    box_h = int(cell * 0.24)
+
+    def stamp(color: Tuple[int, int, int, int], kind: str, text: str, x0: int, y0: int) -> None:
+        mask, dx, dy = cell_tile(kind, text, cell)
+        img.paste(color, (x0 + dx, y0 + dy, x0 + dx + mask.width, y0 + dy + mask.height), mask)
+
+    for y in range(rows):
+        for x in range(cols):
             active = solution[y][x] is not None
             x0 = x * cell
             y0 = y * cell
-            x1 = x0 + cell
-            y1 = y0 + cell
-
-            draw.rectangle([x0, y0, x1, y1], fill=(255, 255, 255) if active else (90, 90, 90), outline=(175, 175, 175))
+            # 테두리 1px이 다음 칸과 겹침, 그림 밖으로 나가는 부분은 paste가 잘라 냄 (draw.rectangle과 같은 결과)
+            img.paste(active_tile if active else blocked_tile, (x0, y0))
 
             if active and number_map[y][x] is not None:
-                draw.rectangle([x0 + 1, y0 + 1, x0 + int(cell * 0.30), y0 + int(cell * 0.24)], fill=(255, 255, 255))
-                draw.text((x0 + 3, y0 + 2), str(number_map[y][x]), font=num_font, fill=(0, 115, 230))
+                img.paste((255, 255, 255, 255), (x0 + 1, y0 + 1, x0 + box_w + 1, y0 + box_h + 1))
+                stamp((0, 115, 230, 255), "num", str(number_map[y][x]), x0, y0)
 
             if show_answer and active and solution[y][x]:
-                ch = solution[y][x]
-                bbox = draw.textbbox((0, 0), ch, font=char_font)
-                tw = bbox[2] - bbox[0]
-                th = bbox[3] - bbox[1]
-                draw.text((x0 + (cell - tw) // 2, y0 + (cell - th) // 2 - 2), ch, font=char_font, fill=(15, 15, 15))
+                stamp((15, 15, 15, 255), "char", solution[y][x], x0, y0)
 
     return img
 
@@ -376,6 +893,7 @@ def add_branding(base: Image.Image, logo: Optional[Image.Image], y_bottom: int)
 
 
 def render_board_card(board: Image.Image, title: str, subtitle: str, size: Tuple[int, int], logo: Optional[Image.Image]) -> Image.Image:
+    """보드가 card_board_box에 들어가면 그 크기 그대로 가운데에 (save_bundle은 칸 크기를 맞춰 그림), 크면 줄여서 넣음."""
     w, h = size
     base = Image.new("RGBA", (w, h), (247, 250, 255, 255))
     draw = ImageDraw.Draw(base)
@@ -388,12 +906,13 @@ def render_board_card(board: Image.Image, title: str, subtitle: str, size: Tuple
     draw.text((40, 36), title, font=title_font, fill=(15, 23, 42))
     draw.text((40, 88), subtitle, font=sub_font, fill=(51, 65, 85))
 
-    avail_w = w - 120
-    avail_h = h - header_h - 140
-    ratio = min(avail_w / board.width, avail_h / board.height)
-    bw = int(board.width * ratio)
-    bh = int(board.height * ratio)
-    board_resized = board.resize((bw, bh), Image.Resampling.LANCZOS)
+    avail_w, avail_h = card_board_box(size)
+    if board.width <= avail_w and board.height <= avail_h:
+        board_resized = board
+    else:
+        ratio = min(avail_w / board.width, avail_h / board.height)
+        board_resized = board.resize((int(board.width * ratio), int(board.height * ratio)), Image.Resampling.LANCZOS)
+    bw, bh = board_resized.size
 
     bx = (w - bw) // 2
     by = header_h + (avail_h - bh) // 2
@@ -458,29 +977,37 @@ def render_hint_card(across: List[PlacedWord], down: List[PlacedWord], title: st
     return base
 
 
-def save_bundle(built: BuiltPuzzle, out_dir: Path, puzzle_id: str) -> None:
+def save_bundle(built: BuiltPuzzle, out_dir: Path, puzzle_id: str, stats: Optional[ImageStats] = None) -> None:
+    """비율마다 퍼즐·힌트·정답 카드 저장 (형식은 image_output: 팔레트 PNG, IMAGE_WEBP=1이면 .webp도). stats에 바이트 합계."""
     logo = Image.open(LOGO_PATH).convert("RGBA") if LOGO_PATH.exists() else None
 
-    puzzle_board = render_board(built.solution, built.number_map, show_answer=False)
-    answer_board = render_board(built.solution, built.number_map, show_answer=True)
+    built = crop_to_content(built)
     seo_base = seo_image_base(built.title, puzzle_id)
+    # 비율마다 카드 보드 칸에 맞는 칸 크기로 바로 그림 (리샘플링 없음). 칸 크기가 같은 비율끼리는 같은 보드 재사용
+    boards: Dict[Tuple[bool, int], Image.Image] = {}
+
+    def board_for(show_answer: bool, size: Tuple[int, int]) -> Image.Image:
+        cell = board_cell(built.solution, card_board_box(size))
+        key = (show_answer, cell)
+        if key not in boards:
+            boards[key] = render_board(built.solution, built.number_map, show_answer, cell=cell)
+        return boards[key]
 
     for ratio_name, size in RATIOS.items():
         ratio_dir = out_dir / ratio_name
         ratio_dir.mkdir(parents=True, exist_ok=True)
 
-        puzzle_img = render_board_card(puzzle_board, built.title, "Puzzle Image", size, logo)
+        puzzle_img = render_board_card(board_for(False, size), built.title, "Puzzle Image", size, logo)
         hint_img = render_hint_card(built.across, built.down, built.title, size, logo)
-        answer_img = render_board_card(answer_board, built.title, "Answer Image", size, logo)
-
-        puzzle_img.save(ratio_dir / "puzzle.png", format="PNG")
-        hint_img.save(ratio_dir / "hint.png", format="PNG")
-        answer_img.save(ratio_dir / "answer.png", format="PNG")
+        answer_img = render_board_card(board_for(True, size), built.title, "Answer Image", size, logo)
 
-        # Pinterest/멀티모달 SEO 파일명 버전도 함께 생성
-        puzzle_img.save(ratio_dir / f"{seo_base}-bible-crossword-puzzle-{ratio_name}.png", format="PNG")
-        hint_img.save(ratio_dir / f"{seo_base}-sunday-school-material-{ratio_name}.png", format="PNG")
-        answer_img.save(ratio_dir / f"{seo_base}-church-activity-answer-{ratio_name}.png", format="PNG")
+        # 카드마다 인코딩은 한 번, Pinterest/멀티모달 SEO 파일명 버전은 같은 파일의 하드링크 (안 되면 복사)
+        save_image(puzzle_img, ratio_dir / "puzzle.png",
+                   [ratio_dir / f"{seo_base}-bible-crossword-puzzle-{ratio_name}.png"], stats)
+        save_image(hint_img, ratio_dir / "hint.png",
+                   [ratio_dir / f"{seo_base}-sunday-school-material-{ratio_name}.png"], stats)
+        save_image(answer_img, ratio_dir / "answer.png",
+                   [ratio_dir / f"{seo_base}-church-activity-answer-{ratio_name}.png"], stats)
 
     # Pinterest 설명/ALT 복붙 템플릿
     caption = (
@@ -503,7 +1030,94 @@ def collect_queue_files() -> List[Path]:
     return sorted([p for p in QUEUE_DIR.iterdir() if p.is_file() and not p.name.startswith(".")])
 
 
-def process_one(queue_file: Path) -> bool:
+def default_seed(puzzle_id: str) -> int:
+    """시드를 주지 않으면 퍼즐 id에서 고정 시드를 만듦 → 같은 퀴즈는 매번 같은 배치."""
+    return int(hashlib.sha256(puzzle_id.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def layout_cache_path(data: PuzzleData, seed: int, restarts: int = 1, engine: str = "greedy",
+                      budget_s: float = 3.0, budget_ms: int = SEARCH_BUDGET_MS) -> Path:
+    """(puzzle_id, 단어 목록 해시, 시드, 격자 크기, restarts, engine) 키의 배치 캐시 파일.
+    restarts > 1이면 budget_s 안에 끝난 시드 중에서 고르므로 budget_s도, search 엔진은 결과가 탐색 시간에 달렸으므로
+    budget_ms도 키에 넣음."""
+    words_hash = hashlib.sha256(
+        json.dumps([[w.clue, w.answer] for w in data.words], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    size = grid_size(data.words, target_count(len(data.words)))
+    runs = f"{restarts}x{budget_s:g}s" if restarts > 1 else "1"
+    method = f"search{budget_ms}ms" if engine == "search" else engine
+    key = f"{LAYOUT_CACHE_VERSION}-{size}-{seed}-{runs}-{method}-{words_hash}"
+    return LAYOUT_CACHE_DIR / sanitize_name(data.puzzle_id) / f"{key}.json"
+
+
+def built_to_json(built: BuiltPuzzle) -> dict:
+    numbers = [[x, y, n] for y, row in enumerate(built.number_map) for x, n in enumerate(row) if n is not None]
+    return {
+        "title": built.title,
+        "seed": built.seed,
+        "size": len(built.solution),
+        "solution": built.solution,
+        "numbers": numbers,
+        "across": [[q.num, q.x, q.y, q.clue, q.answer] for q in built.across],
+        "down": [[q.num, q.x, q.y, q.clue, q.answer] for q in built.down],
+    }
+
+
+def built_from_json(obj: dict) -> BuiltPuzzle:
+    size = obj["size"]
+    number_map: List[List[Optional[int]]] = [[None for _ in range(size)] for _ in range(size)]
+    for x, y, n in obj["numbers"]:
+        number_map[y][x] = n
+    return BuiltPuzzle(
+        title=obj["title"],
+        solution=obj["solution"],
+        number_map=number_map,
+        across=[PlacedWord(num, x, y, "across", clue, answer) for num, x, y, clue, answer in obj["across"]],
+        down=[PlacedWord(num, x, y, "down", clue, answer) for num, x, y, clue, answer in obj["down"]],
+        seed=obj["seed"],
+    )
+
+
+def cached_build(data: PuzzleData, seed: Optional[int] = None, restarts: int = 1, budget_s: float = 3.0,
+                 pool: Optional[ProcessPoolExecutor] = None, rebuild: bool = False, engine: str = "greedy",
+                 budget_ms: int = SEARCH_BUDGET_MS) -> Tuple[BuiltPuzzle, bool]:
+    """배치 캐시가 있으면 그대로, 없으면 build_layout/build_best_puzzle 후 저장. (결과, 캐시 적중 여부) 반환."""
+    if seed is None:
+        seed = default_seed(data.puzzle_id)
+    path = layout_cache_path(data, seed, restarts, engine, budget_s, budget_ms)
+    if not rebuild and path.exists():
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return built_from_json(json.load(f)), True
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    if restarts > 1:
+        built = build_best_puzzle(data, restarts=restarts, budget_s=budget_s, base_seed=seed, pool=pool,
+                                  engine=engine, budget_ms=budget_ms)
+    else:
+        built = build_layout(data, seed, engine, budget_ms)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(built_to_json(built), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return built, False
+
+
+def arg_value(name: str, default: str) -> str:
+    """`--name=value` 형태 인자 값 (없으면 default)."""
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):].strip()
+    return default
+
+
+def process_one(queue_file: Path, seed: Optional[int] = None, restarts: int = 1, budget_s: float = 3.0,
+                pool: Optional[ProcessPoolExecutor] = None, rebuild: bool = False, engine: str = "greedy",
+                budget_ms: int = SEARCH_BUDGET_MS, stats: Optional[ImageStats] = None) -> bool:
     puzzle_id = queue_file.stem.strip()
     try:
         data = load_quiz_data_from_js(puzzle_id)
@@ -512,12 +1126,16 @@ def process_one(queue_file: Path) -> bool:
         return False
 
     try:
-        built = build_puzzle(data)
+        built, hit = cached_build(data, seed=seed, restarts=restarts, budget_s=budget_s, pool=pool, rebuild=rebuild,
+                                  engine=engine, budget_ms=budget_ms)
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_title = sanitize_name(data.title)
         out_dir = OUTPUT_DIR / f"{ts}_{puzzle_id}_{safe_title}"
-        save_bundle(built, out_dir, puzzle_id)
-        write_log(f"OK {puzzle_id} -> {out_dir}")
+        save_bundle(built, out_dir, puzzle_id, stats)
+        placed, crossings, density = layout_score(built)
+        write_log(f"OK {puzzle_id} -> {out_dir} (seed={built.seed}{', cached' if hit else ''}, "
+                  f"grid={len(built.solution)}, words={placed}, "
+                  f"crossings={crossings}, density={density:.2f})")
         return True
     except Exception as e:
         write_log(f"FAIL {puzzle_id}: {e}")
@@ -526,6 +1144,8 @@ def process_one(queue_file: Path) -> bool:
 
 def main() -> int:
     ensure_dirs()
+    if "--rebuild-cache" in sys.argv:
+        load_database(str(DATA_JS_PATH), rebuild=True)
     queue_files = collect_queue_files()
 
     if not queue_files:
@@ -533,21 +1153,51 @@ def main() -> int:
         print("Create empty files like gen_001.txt then run again.")
         return 0
 
+    font_error = check_fonts()
+    if font_error:
+        print(font_error)
+        return 2
+
     print(f"Queue count: {len(queue_files)}")
     success = 0
     failed = 0
 
-    for qf in queue_files:
-        ok = process_one(qf)
-        if ok:
-            success += 1
-            shutil.move(str(qf), str(DONE_DIR / qf.name))
-        else:
-            failed += 1
-            fail_name = qf.with_suffix(qf.suffix + ".failed")
-            shutil.move(str(qf), str(DONE_DIR / fail_name.name))
+    # --seed=N: 배치 시드 (기본: 퍼즐 id에서 고정), --rebuild-layout: 배치 캐시 무시
+    seed_arg = arg_value("seed", "")
+    seed = int(seed_arg) if seed_arg else None
+    rebuild = "--rebuild-layout" in sys.argv
+    # --engine=search: 백트래킹 배치 엔진 (--budget-ms=N 밀리초 제한, 기본 500)
+    engine = arg_value("engine", "greedy")
+    if engine not in ENGINES:
+        print(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+        return 2
+    budget_ms = int(arg_value("budget-ms", str(SEARCH_BUDGET_MS)))
+    # --restarts=N: 퍼즐마다 시드 N개로 만들어 가장 좋은 배치 선택 (--workers=N 프로세스, --budget=초 제한)
+    restarts = int(arg_value("restarts", "1"))
+    budget_s = float(arg_value("budget", "3"))
+    workers = int(arg_value("workers", "0")) or None
+    pool = ProcessPoolExecutor(max_workers=workers) if restarts > 1 and workers != 1 else None
+    # --image-report: 예전 PNG 방식 대비 줄어든 바이트 수도 계산 (카드마다 인코딩 한 번 더)
+    stats = ImageStats(measure="--image-report" in sys.argv)
+
+    try:
+        for qf in queue_files:
+            ok = process_one(qf, seed=seed, restarts=restarts, budget_s=budget_s, pool=pool, rebuild=rebuild,
+                             engine=engine, budget_ms=budget_ms, stats=stats)
+            if ok:
+                success += 1
+                shutil.move(str(qf), str(DONE_DIR / qf.name))
+            else:
+                failed += 1
+                fail_name = qf.with_suffix(qf.suffix + ".failed")
+                shutil.move(str(qf), str(DONE_DIR / fail_name.name))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
     print(f"Done. success={success}, failed={failed}")
+    if stats.files:
+        print(stats.report())
     print(f"Output folder: {OUTPUT_DIR}")
     return 0 if failed == 0 else 1
 
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+배치 빌더 회귀 테스트 (표준 unittest, data.js 불필요)
+- 사용: cd social_export && python3 -m unittest test_layout
+"""
+import unittest
+
+from social_batch_export import Board, PuzzleData, WordEntry, build_layout, stacked_cells
+
+
+def codes(word):
+    return [ord(ch) for ch in word]
+
+
+def pool(*answers):
+    return PuzzleData(puzzle_id="test", title="test", words=[WordEntry(clue=a, answer=a) for a in answers])
+
+
+class SameDirectionOverlapTest(unittest.TestCase):
+    def test_crossing_slot_can_run_along_same_direction_word(self):
+        # can_place만으로는 받아들여지는 자리: "마바가나"가 세로 "가나"를 따라 겹침 → overlaps_direction으로 걸러야 함
+        board = Board(9)
+        board.place(codes("가나"), 4, 3, "down")
+        board.place(codes("다마"), 3, 1, "across")
+        self.assertIn((4, 1, "down"), board.crossing_slots(codes("마바가나")))
+        self.assertEqual(board.can_place(codes("마바가나"), 4, 1, "down"), (True, 3))
+        self.assertTrue(board.overlaps_direction(4, 4, 1, "down"))
+
+    def test_free_slots_skip_same_direction_words(self):
+        board = Board(9)
+        board.place(codes("가나"), 2, 4, "across")
+        self.assertNotIn((2, 4, "across"), board.free_slots(codes("가나")))
+
+    def test_greedy_does_not_extend_a_placed_word(self):
+        # 시드 0에서 "가다나바"가 이미 놓인 세로 "가다"를 따라 놓이던 풀
+        built = build_layout(pool("마바나", "가다나바", "가다"), seed=0, engine="greedy", target=3, size=7)
+        self.assertEqual(stacked_cells(built), [])
+
+    def test_no_stacking_over_many_seeds(self):
+        data = pool("가나가나", "마가나바", "나바", "다바", "가마가다", "바나가", "가다", "다마바나")
+        for engine in ("greedy", "search"):
+            for seed in range(30):
+                with self.subTest(engine=engine, seed=seed):
+                    built = build_layout(data, seed=seed, engine=engine, budget_ms=50, size=7)
+                    self.assertEqual(stacked_cells(built), [])
+
+
+class StackedCellsTest(unittest.TestCase):
+    def test_reports_partial_overlap(self):
+        data = pool("가나")
+        built = build_layout(data, seed=0, size=7)
+        word = built.across[0]
+        built.across.append(word.__class__(num=99, x=word.x + 1, y=word.y, dir="across", clue="x", answer="나다"))
+        self.assertEqual(stacked_cells(built), [(word.x + 1, word.y, "across")])
+
+
+if __name__ == "__main__":
+    unittest.main()